@@ -0,0 +1,143 @@
+"""Central asset cache: images decoded and display-converted once, small sprites packed into atlases."""
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+import settings
+
+atlasSize = 1024
+# Sprites up to this size (either side) are packed into atlas pages
+atlasMaxSprite = 128
+atlasPadding = 1
+
+
+class SpriteAtlas:
+    """One RGBA page filled shelf by shelf; packed sprites are subsurfaces of it."""
+    def __init__(self, size: int = atlasSize):
+        self.size = size
+        self.page = pygame.Surface((size, size), pygame.SRCALPHA)
+        self._x = 0
+        self._shelfY = 0
+        self._shelfHeight = 0
+
+    def add(self, surface: pygame.Surface):
+        """Copy a surface into the page; returns its subsurface, or None when it does not fit."""
+        w, h = surface.get_size()
+        pw, ph = w + atlasPadding, h + atlasPadding
+        if self._x + pw > self.size:
+            self._shelfY += self._shelfHeight
+            self._x = self._shelfHeight = 0
+        if pw > self.size or self._shelfY + ph > self.size:
+            return None
+        rect = pygame.Rect(self._x, self._shelfY, w, h)
+        # MAX onto the empty page copies pixels exactly, alpha included
+        self.page.blit(surface, rect.topleft, special_flags=pygame.BLEND_RGBA_MAX)
+        self._x += pw
+        self._shelfHeight = max(self._shelfHeight, ph)
+        return self.page.subsurface(rect)
+
+
+class AssetManager:
+    """
+    Loads every image once and keeps the display-converted surface.
+    Results no larger than `maxSprite` are packed into atlas pages and
+    stay resident. Larger ones (boss art, backgrounds) share an LRU byte
+    budget; one evicted to make room is reloaded on its next use. Scaled
+    variants are made from the cached original, never from the file.
+    """
+    def __init__(self, budgetBytes: int = settings.ASSET_BUDGET_MB * 1024 * 1024,
+                 maxSprite: int = atlasMaxSprite, pageSize: int = atlasSize):
+        self.budgetBytes = budgetBytes
+        self.maxSprite = maxSprite
+        self.pageSize = pageSize
+        self.atlases = []
+        self._sprites = {}
+        self._large = OrderedDict()
+        self.largeBytes = 0
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def _decode(self, path: str) -> pygame.Surface:
+        surface = pygame.image.load(path)
+        self.loads += 1
+        # Conversion needs a display mode; headless processes keep the decoded format
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return surface
+
+    def _lookup(self, key):
+        surface = self._sprites.get(key)
+        if surface is None:
+            surface = self._large.get(key)
+            if surface is not None:
+                self._large.move_to_end(key)
+        if surface is not None:
+            self.hits += 1
+        return surface
+
+    def _pack(self, surface: pygame.Surface):
+        for atlas in self.atlases:
+            packed = atlas.add(surface)
+            if packed is not None:
+                return packed
+        atlas = SpriteAtlas(self.pageSize)
+        self.atlases.append(atlas)
+        return atlas.add(surface)
+
+    def _store(self, key, surface: pygame.Surface) -> pygame.Surface:
+        w, h = surface.get_size()
+        if w <= self.maxSprite and h <= self.maxSprite:
+            packed = self._pack(surface)
+            if packed is not None:
+                self._sprites[key] = packed
+                return packed
+        self._large[key] = surface
+        self.largeBytes += surface.get_pitch() * h
+        # The newest asset always stays, even alone over budget
+        while self.largeBytes > self.budgetBytes and len(self._large) > 1:
+            _, old = self._large.popitem(last=False)
+            self.largeBytes -= old.get_pitch() * old.get_height()
+            self.evictions += 1
+        return surface
+
+    def image(self, path: str, size=None) -> pygame.Surface:
+        """An image file, optionally smooth-scaled to (width, height)."""
+        key = (os.path.abspath(path), tuple(size) if size else None)
+        surface = self._lookup(key)
+        if surface is not None:
+            return surface
+        if size:
+            surface = pygame.transform.smoothscale(self.image(path), tuple(size))
+        else:
+            surface = self._decode(path)
+        return self._store(key, surface)
+
+    def sprite(self, key, render) -> pygame.Surface:
+        """A generated sprite, built once by `render()` and cached under `key`."""
+        surface = self._lookup(key)
+        if surface is None:
+            surface = self._store(key, render())
+        return surface
+
+    def circle(self, color, radius: int) -> pygame.Surface:
+        """Filled circle sprite of a bullet look."""
+        def render():
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (radius, radius), radius)
+            return surface
+        return self.sprite(("circle", tuple(color), radius), render)
+
+    def square(self, color, size: int) -> pygame.Surface:
+        """Opaque filled square of a bullet look, for degraded-quality drawing."""
+        def render():
+            surface = pygame.Surface((size, size))
+            surface.fill(color)
+            return surface
+        return self.sprite(("square", tuple(color), size), render)
+
+
+# Shared by every system that draws sprites
+assets = AssetManager()
@@ -1,45 +1,203 @@
 """Audio analysis and beat detection for rhythm-synchronized effects."""
 
+import hashlib
+import os
 import numpy as np
 import pygame
 import wave
-import struct
+import zipfile
+
+import settings
+from beat_schedule import BeatGrid
+from event_bus import EventBus
+
+# Event topics published on the bus
+AUDIO_FRAME = "audio.frame"
+ONSET_KICK = "audio.kick"
+ONSET_SNARE = "audio.snare"
+ONSET_HIHAT = "audio.hihat"
+
+
+class AudioFrame:
+    """Per-frame band levels shared with subscribers (reused, never reallocated)."""
+    __slots__ = ("index", "kick", "snare", "hihat", "rms", "amplitude")
+
+    def __init__(self):
+        self.index = 0
+        self.kick = 0.0
+        self.snare = 0.0
+        self.hihat = 0.0
+        self.rms = 0.0
+        self.amplitude = 1.0
+
+
+class SpectralAnalyzer:
+    """
+    Runs a single batched STFT over a whole track and stores per-frame
+    band energies, full-band RMS and adaptive-threshold onsets.
+    """
+    BANDS = (
+        ("kick", 20, 100),
+        ("snare", 150, 400),
+        ("hihat", 6000, 16000),
+    )
+
+    def __init__(self, samples: np.ndarray, sampleRate: int = 44100, frameSize: int = 1024,
+                 hopSize: int = 735, maxHistory: int = 50, sensitivity: float = 1.8, batchFrames: int = 512):
+        self.sampleRate = sampleRate
+        self.frameSize = frameSize
+        self.hopSize = hopSize
+        self.numFrames = max(1, (len(samples) - frameSize) // hopSize + 1)
+        self.duration = len(samples) / sampleRate
+
+        if len(samples) < frameSize:
+            samples = np.pad(samples, (0, frameSize - len(samples)))
+        windows = np.lib.stride_tricks.sliding_window_view(samples, frameSize)[::hopSize][:self.numFrames]
+
+        # Bins x bands selection matrix so every band is one matmul
+        freqs = np.fft.rfftfreq(frameSize, 1 / sampleRate)
+        bandMatrix = np.stack([
+            ((freqs >= lo) & (freqs <= hi)).astype(np.float32)
+            for _, lo, hi in self.BANDS
+        ], axis=1)
+
+        energies = np.empty((self.numFrames, len(self.BANDS)), dtype=np.float32)
+        for start in range(0, self.numFrames, batchFrames):
+            chunk = windows[start:start + batchFrames]
+            spectrum = np.abs(np.fft.rfft(chunk, axis=1)).astype(np.float32)
+            energies[start:start + len(chunk)] = spectrum @ bandMatrix
+
+        # Adaptive threshold: mean of the previous maxHistory frames per band
+        cumulative = np.cumsum(np.vstack([np.zeros((1, len(self.BANDS)), np.float32), energies]), axis=0)
+        upper = np.arange(1, self.numFrames + 1)
+        lower = np.maximum(0, upper - maxHistory)
+        average = (cumulative[upper] - cumulative[lower]) / (upper - lower)[:, None]
+        self.onsets = energies > average * sensitivity
+
+        peak = energies.max(axis=0)
+        self.levels = energies / np.where(peak > 0, peak, 1.0)
+        self.rms = np.sqrt(np.mean(np.square(windows, dtype=np.float32), axis=1))
+        self.bandIndex = {name: i for i, (name, _, _) in enumerate(self.BANDS)}
+
+    def save(self, path: str) -> None:
+        """Store the analysis results so a later launch can skip decoding and the STFT."""
+        np.savez(path, onsets=self.onsets, levels=self.levels, rms=self.rms,
+                 params=np.array([self.sampleRate, self.frameSize, self.hopSize, self.numFrames]),
+                 duration=np.array(self.duration))
+
+    @classmethod
+    def load(cls, path: str) -> "SpectralAnalyzer":
+        """Restore results written by save()."""
+        with np.load(path) as data:
+            analyzer = cls.__new__(cls)
+            analyzer.sampleRate, analyzer.frameSize, analyzer.hopSize, analyzer.numFrames = \
+                (int(v) for v in data["params"])
+            analyzer.duration = float(data["duration"])
+            analyzer.onsets = data["onsets"]
+            analyzer.levels = data["levels"]
+            analyzer.rms = data["rms"]
+        analyzer.bandIndex = {name: i for i, (name, _, _) in enumerate(cls.BANDS)}
+        return analyzer
+
+    def beatMap(self, band: str = "kick") -> np.ndarray:
+        """Onset times in seconds for one band."""
+        frames = np.flatnonzero(self.onsets[:, self.bandIndex[band]])
+        return frames * self.hopSize / self.sampleRate
+
+    def frameAt(self, seconds: float) -> int:
+        """Map a playback position to an analysis frame index."""
+        return int(seconds * self.sampleRate / self.hopSize) % self.numFrames
+
+    def onsetsBetween(self, start: int, end: int) -> np.ndarray:
+        """Return per-band flags for any onset in frames (start, end]."""
+        if end >= start:
+            return self.onsets[start + 1:end + 1].any(axis=0)
+        # Wrapped around the loop point
+        return self.onsets[start + 1:].any(axis=0) | self.onsets[:end + 1].any(axis=0)
 
 
 class BeatPulseController:
     """
-    Detects kick drum transients from a .wav file and plays audio in a loop.
-    Returns a smoothed amplitude value for visual/gameplay effects.
+    Analyzes a .wav file and plays it in a loop.
+    Publishes band levels and onsets on an event bus each frame and
+    returns a smoothed kick amplitude for visual/gameplay effects.
+    Decoding and analysis wait until `analyzer` or `beatGrid` is first
+    used, and their results are cached on disk per file and parameters.
     """
-    def __init__(self, audioPath: str, decay: float = 0.85, sensitivity: float = 1.8):
+    def __init__(self, audioPath: str, decay: float = 0.85, sensitivity: float = 1.8, bus: EventBus = None):
         self.decay = decay
         self.sensitivity = sensitivity
-        self.energyHistory = []
         self.maxHistory = 50
         self.lastAmplitude = 1.0
 
-        self.samples = self._loadAudio(audioPath)
         self.sampleRate = 44100
         self.frameSize = 1024
+        # The header alone gives the loop length; samples are decoded only on a cache miss
+        with wave.open(audioPath, 'rb') as wf:
+            self.sampleRate = wf.getframerate()
+            self.duration = wf.getnframes() / self.sampleRate
+        self._analyzer = None
+        self._beatGrid = None
         self.frameIndex = 0
+        self.playTime = 0.0
+
+        self.bus = bus if bus is not None else EventBus()
+        self.frame = AudioFrame()
+        self._onsetTopics = [ONSET_KICK, ONSET_SNARE, ONSET_HIHAT]
 
         self.audioPath = audioPath
         self._playbackStarted = False
-        self._onKick = None
 
         pygame.mixer.init()
 
+    def _cachePath(self) -> str:
+        stat = os.stat(self.audioPath)
+        key = "|".join(str(v) for v in (os.path.abspath(self.audioPath), stat.st_size, stat.st_mtime_ns,
+                                         self.frameSize, self.sampleRate // settings.FPS_TARGET,
+                                         self.maxHistory, self.sensitivity))
+        return os.path.join(settings.CACHE_DIR, "analysis-" + hashlib.sha1(key.encode()).hexdigest()[:16] + ".npz")
+
+    @property
+    def analyzer(self) -> SpectralAnalyzer:
+        """Band analysis of the track, loaded from the cache or computed on first use."""
+        if self._analyzer is None:
+            path = self._cachePath()
+            try:
+                self._analyzer = SpectralAnalyzer.load(path)
+            except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+                self._analyzer = SpectralAnalyzer(
+                    self._loadAudio(self.audioPath), self.sampleRate, self.frameSize,
+                    hopSize=self.sampleRate // settings.FPS_TARGET, maxHistory=self.maxHistory,
+                    sensitivity=self.sensitivity
+                )
+                try:
+                    os.makedirs(settings.CACHE_DIR, exist_ok=True)
+                    self._analyzer.save(path)
+                except OSError:
+                    pass
+        return self._analyzer
+
+    @property
+    def beatGrid(self) -> BeatGrid:
+        if self._beatGrid is None:
+            self._beatGrid = BeatGrid.fromOnsets(self.analyzer.beatMap("kick"), self.duration)
+        return self._beatGrid
+
     def _loadAudio(self, path: str):
         """Load and normalize audio samples from a WAV file."""
         with wave.open(path, 'rb') as wf:
+            self.sampleRate = wf.getframerate()
             frames = wf.readframes(wf.getnframes())
-            samples = struct.unpack_from("%dh" % wf.getnframes(), frames)
-            samples = np.array(samples, dtype=np.float32)
-            samples /= np.max(np.abs(samples))
+            samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32)
             if wf.getnchannels() == 2:
                 samples = samples[::2]  # Convert stereo to mono
+            samples /= max(1.0, float(np.max(np.abs(samples))))
             return samples
 
+    def setOnKick(self, callbackFn):
+        """Register a callback triggered on kick detection."""
+        self.bus.subscribe(ONSET_KICK, callbackFn)
+
     def startAudio(self):
         """Start audio playback (loops indefinitely)."""
         if not self._playbackStarted:
@@ -47,39 +205,42 @@ class BeatPulseController:
             pygame.mixer.music.play(loops=-1)
             self._playbackStarted = True
 
+    def playbackSeconds(self) -> float:
+        """Current position in the track, from the mixer when available."""
+        posMs = pygame.mixer.music.get_pos()
+        if posMs >= 0:
+            return (posMs / 1000.0) % self.duration
+        return self.playTime % self.duration
+
     def update(self, dt: float) -> float:
-        """Update beat detection and return smoothed amplitude."""
+        """Publish this frame's audio events and return smoothed amplitude."""
         self.startAudio()
+        self.playTime += dt
 
-        start = self.frameIndex
-        end = start + self.frameSize
-        self.frameIndex += self.frameSize
-
-        if end >= len(self.samples):
-            self.frameIndex = 0
-
-        frame = self.samples[start:end]
-        if len(frame) < self.frameSize:
-            frame = np.pad(frame, (0, self.frameSize - len(frame)))
-
-        # Analyze kick band (20-100 Hz)
-        fftData = np.abs(np.fft.rfft(frame))
-        freqs = np.fft.rfftfreq(len(frame), 1 / self.sampleRate)
-        kickBand = fftData[(freqs >= 20) & (freqs <= 100)]
-        energy = np.sum(kickBand)
-
-        # Update energy history for adaptive thresholding
-        self.energyHistory.append(energy)
-        if len(self.energyHistory) > self.maxHistory:
-            self.energyHistory.pop(0)
-
-        avgEnergy = np.mean(self.energyHistory)
-        threshold = avgEnergy * self.sensitivity
+        analyzer = self.analyzer
+        prevIndex = self.frameIndex
+        self.frameIndex = analyzer.frameAt(self.playbackSeconds())
+        onsets = analyzer.onsetsBetween(prevIndex, self.frameIndex)
 
         # Update amplitude with decay
-        if energy > threshold:
+        if onsets[0]:
             self.lastAmplitude = 1.5
         else:
             self.lastAmplitude *= self.decay
 
+        levels = analyzer.levels[self.frameIndex]
+        frame = self.frame
+        frame.index = self.frameIndex
+        frame.kick = float(levels[0])
+        frame.snare = float(levels[1])
+        frame.hihat = float(levels[2])
+        frame.rms = float(analyzer.rms[self.frameIndex])
+        frame.amplitude = self.lastAmplitude
+
+        bus = self.bus
+        bus.publish(AUDIO_FRAME, frame)
+        for band, topic in enumerate(self._onsetTopics):
+            if onsets[band]:
+                bus.publish(topic, float(levels[band]))
+
         return self.lastAmplitude
@@ -0,0 +1,122 @@
+"""Beat grid and beat-quantized spawn scheduling for emitters."""
+
+import math
+from collections import deque
+
+import numpy as np
+import settings
+
+
+class BeatGrid:
+    """Regular beat grid over a looping track, in seconds."""
+    def __init__(self, beatPeriod: float, firstBeat: float = 0.0, loopLength: float = 0.0, beatsPerBar: int = 4):
+        self.beatPeriod = beatPeriod
+        self.firstBeat = firstBeat
+        self.loopLength = loopLength
+        self.beatsPerBar = beatsPerBar
+
+    @classmethod
+    def fromOnsets(cls, onsetTimes, loopLength: float, beatsPerBar: int = 4, minInterval: float = 0.25):
+        """Fit a grid to a precomputed beat map (onset times in seconds)."""
+        times = np.asarray(onsetTimes, dtype=np.float64)
+        if len(times) < 2:
+            return cls(60.0 / 120.0, 0.0, loopLength, beatsPerBar)
+
+        # Keep only the first frame of each onset cluster
+        times = times[np.concatenate(([True], np.diff(times) > minInterval))]
+        intervals = np.diff(times)
+        intervals = intervals[intervals > minInterval]
+        period = float(np.median(intervals)) if len(intervals) else 0.5
+
+        # Circular mean of onset phases gives the grid offset
+        phases = 2 * np.pi * (times % period) / period
+        mean = math.atan2(np.sin(phases).mean(), np.cos(phases).mean())
+        firstBeat = (mean % (2 * np.pi)) / (2 * np.pi) * period
+        return cls(period, firstBeat, loopLength, beatsPerBar)
+
+    def beatAt(self, seconds: float) -> float:
+        """Fractional beat number at a time."""
+        return (seconds - self.firstBeat) / self.beatPeriod
+
+    def timeOf(self, beat: float) -> float:
+        """Time in seconds of a beat number."""
+        return self.firstBeat + beat * self.beatPeriod
+
+
+class BeatSchedule:
+    """
+    Grid positions an emitter fires on: every N beats, offbeats, or every N bars.
+    """
+    def __init__(self, division: str = "beat", every: int = 1, beatsPerBar: int = 4):
+        if division not in ("beat", "offbeat", "bar"):
+            raise ValueError(f"Unknown beat division: {division}")
+        self.division = division
+        self.step = every * (beatsPerBar if division == "bar" else 1)
+        self.phase = 0.5 if division == "offbeat" else 0.0
+
+    def eventsBetween(self, grid: BeatGrid, start: float, end: float, thin: int = 1):
+        """Yield event times in the window (start, end], keeping every `thin`-th event."""
+        b0 = (grid.beatAt(start) - self.phase) / self.step
+        b1 = (grid.beatAt(end) - self.phase) / self.step
+        for k in range(math.floor(b0) + 1, math.floor(b1) + 1):
+            if k % thin == 0:
+                yield grid.timeOf(k * self.step + self.phase)
+
+
+class BeatScheduler:
+    """
+    Fires emitter spawns on beat-grid positions.
+    Spawns landing between ticks are advanced by their lateness, and
+    coincident bursts are spread over several ticks.
+    """
+    def __init__(self, grid: BeatGrid, maxBurstsPerTick: int = 2, fps: int = settings.FPS_TARGET):
+        self.grid = grid
+        self.maxBurstsPerTick = maxBurstsPerTick
+        self.fps = fps
+        self.entries = []
+        self.pending = deque()
+        self._lastSeconds = None
+
+    def add(self, emitter) -> None:
+        """Drive an emitter's spawns from its schedule."""
+        self.entries.append(emitter)
+        emitter.beatDriven = True
+
+    def remove(self, emitter) -> None:
+        """Return an emitter to interval spawning."""
+        if emitter in self.entries:
+            self.entries.remove(emitter)
+            emitter.beatDriven = False
+
+    def _collect(self, emitter, start, end, wrapOffset):
+        for t in emitter.schedule.eventsBetween(self.grid, start, end, emitter.intervalScale):
+            self.pending.append((emitter, t - wrapOffset))
+
+    def update(self, seconds: float, isActive) -> None:
+        """Queue grid events since the last tick and fire up to the per-tick budget."""
+        last = self._lastSeconds
+        self._lastSeconds = seconds
+        if last is None:
+            return
+
+        loop = self.grid.loopLength
+        wrapped = seconds < last and loop > 0
+        for emitter in self.entries:
+            if not isActive(emitter):
+                continue
+            if wrapped:
+                # Event times are expressed relative to the new loop start
+                self._collect(emitter, last, loop, loop)
+                self._collect(emitter, -1e-9, seconds, 0.0)
+            else:
+                self._collect(emitter, last, seconds, 0.0)
+
+        fired = 0
+        while self.pending and fired < self.maxBurstsPerTick:
+            emitter, eventTime = self.pending.popleft()
+            # Bursts deferred past an emitter's disable (or a phase-end cancel) are dropped
+            if not isActive(emitter):
+                continue
+            lateFrames = max(0.0, (seconds - eventTime) * self.fps)
+            emitter.spawnLate(lateFrames)
+            fired += 1
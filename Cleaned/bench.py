@@ -0,0 +1,350 @@
+"""
+Performance regression suite: micro benchmarks of single kernels and macro
+benchmarks of full headless frames of main.main, compared against a stored
+JSON baseline. Runs on the SDL dummy drivers, no display needed.
+
+    python bench.py --save               # record baselines/default.json
+    python bench.py                      # compare; exit status 1 on a regression, 2 without a baseline
+    python bench.py --only micro --filter collision --tolerance 0.3
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import settings
+from beat_pulse import SpectralAnalyzer
+from bullet_store import BulletStore
+from bullet_system import RadialEmitter
+from collision import ShotCollider, SpatialHash, collidePairs
+from cube import Rotation3D
+from ecs import Archetype, World
+from emitter_manager import EmitterManager, initEmitters
+from hud import HUDRenderer
+from systems import homingSystem, movementSystem, sineSystem
+
+baselineVersion = 1
+here = os.path.dirname(os.path.abspath(__file__))
+baselineDir = os.path.join(here, "baselines")
+defaultTolerance = 0.25
+# Each timing batch runs at least this long, and the best of `repeats` batches counts
+minBatchSeconds = 0.02
+repeats = 7
+
+MICRO = {}
+
+
+def micro(name: str):
+    """Register a micro benchmark: a setup function returning the callable to time."""
+    def register(setup):
+        MICRO[name] = setup
+        return setup
+    return register
+
+
+def timeCall(fn) -> float:
+    """Best per-call milliseconds over several batches."""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= minBatchSeconds:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000.0
+
+
+def bulletTable(n: int, components=(), seed: int = 0) -> BulletStore:
+    """A store holding `n` bullets scattered over the playfield."""
+    rng = np.random.default_rng(seed)
+    table = BulletStore(n, maxBullets=n, components=components, bounds=(1e9, 1e9, 0))
+    table.registerStyle((255, 100, 255), 4)
+    x = rng.uniform(0, settings.WIDTH, n).astype(np.float32)
+    y = rng.uniform(0, settings.HEIGHT, n).astype(np.float32)
+    angles = rng.uniform(0, 2 * np.pi, n)
+    table.spawn(x, y, np.cos(angles).astype(np.float32), np.sin(angles).astype(np.float32))
+    return table
+
+
+@micro("kernels.movement.20k")
+def _movement():
+    world = World()
+    world.addTable("bullets", bulletTable(20000))
+    return lambda: movementSystem(world)
+
+
+@micro("kernels.sine.10k")
+def _sine():
+    world = World()
+    table = world.addTable("sine", bulletTable(10000, ("sine",)))
+    table.amplitude[:] = 10.0
+    table.frequency[:] = 0.2
+    table.perpX[:] = 1.0
+    return lambda: sineSystem(world)
+
+
+@micro("kernels.homing.5k")
+def _homing():
+    world = World()
+    table = world.addTable("bullets", bulletTable(5000))
+    table.turn[:] = 0.05
+    table.homingEnd[:] = 2 ** 30
+    table.homingCount = table.count
+    world.target = SimpleNamespace(x=960.0, y=540.0)
+    return lambda: homingSystem(world)
+
+
+@micro("spawn.radial.burst")
+def _spawnRadial():
+    store = BulletStore(8192, maxBullets=8192)
+    emitter = RadialEmitter()
+    emitter.store, emitter.ownerId = store, 0
+
+    def burst():
+        emitter.spawn()
+        store.compact(np.zeros(store.count, dtype=bool))
+    return burst
+
+
+@micro("spawn.pattern.spiral")
+def _spawnSpiral():
+    manager = EmitterManager()
+    initEmitters(manager)
+    emitter = manager.emitters["spiral"]
+    emitter.prewarm()
+
+    def burst():
+        emitter.spawn()
+        emitter.store.compact(np.zeros(emitter.store.count, dtype=bool))
+    return burst
+
+
+@micro("collision.pairs.hash.200x5k")
+def _collisionHash():
+    bullets = bulletTable(5000)
+    shots = bulletTable(200, seed=1)
+    grid = SpatialHash(32.0)
+    radii, shotRadii = bullets.radii(), shots.radii()
+    return lambda: collidePairs(shots.x[:200], shots.y[:200], shotRadii, bullets.x[:5000], bullets.y[:5000], radii, grid)
+
+
+@micro("collision.shots.boss")
+def _collisionShots():
+    shots = bulletTable(256, seed=2)
+    bosses = Archetype(("position", "hitbox", "enemy"), 8)
+    sl = bosses._allocate(1)
+    bosses.x[sl], bosses.y[sl], bosses.hitRadius[sl], bosses.hp[sl] = 960, 540, 60, 1e9
+    collider = ShotCollider(cancelBullets=False)
+    # Nothing is consumed unless a shot lands on the boss, so the set stays stable
+    shots.x[:] = shots.x % 800
+    return lambda: collider.update(shots, [bosses])
+
+
+@micro("hud.text")
+def _hudText():
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    hud = HUDRenderer(pygame.font.Font(None, 18))
+    return lambda: hud.draw(surface, 60.0, 1234, "full", 5678, 3)
+
+
+@micro("sprites.stamp.5k")
+def _spriteStamp():
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    table = bulletTable(5000)
+    return lambda: table.draw(surface)
+
+
+@micro("sprites.stamp.5k.halfres")
+def _spriteStampHalf():
+    surface = pygame.Surface((settings.WIDTH // 2, settings.HEIGHT // 2))
+    table = bulletTable(5000)
+    return lambda: table.draw(surface, 0.5)
+
+
+@micro("cube.rotation3d")
+def _rotation():
+    rotation = Rotation3D(rates=(0.5, 0.7, 0.3))
+    points = [[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+
+    def step():
+        rotation.update(1 / 60)
+        rotation.rotatePoints(points)
+    return step
+
+
+@micro("audio.analysis.10s")
+def _analysis():
+    samples = np.random.default_rng(3).standard_normal(44100 * 10).astype(np.float32)
+    return lambda: SpectralAnalyzer(samples)
+
+
+_pygameClock = pygame.time.Clock
+
+
+class UncappedClock:
+    """pygame Clock whose tick() never sleeps, so macro frames measure work only."""
+    def __init__(self):
+        self._clock = _pygameClock()
+
+    def tick(self, framerate: int = 0) -> int:
+        return self._clock.tick()
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+
+# Scripted scenarios: frames to run and {frame: [keys]} pressed on those frames
+MACRO = {
+    "idle": (240, {}),
+    "patterns": (240, {2: ["2", "3", "5", "7", "8", "9"]}),
+    "boss": (300, {2: ["b"]}),
+    "bomb": (240, {2: ["7", "8"], 120: ["x"]}),
+}
+macroWarmup = 30
+
+
+def runScenario(frames: int, keys: dict) -> np.ndarray:
+    """Run main.main for `frames` frames with scripted key presses; returns per-frame ms."""
+    import main
+    getEvents = pygame.event.get
+    stamps = []
+
+    def scripted(*args, **kwargs):
+        events = list(getEvents(*args, **kwargs))
+        stamps.append(time.perf_counter())
+        frame = len(stamps)
+        for key in keys.get(frame, ()):
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=getattr(pygame, "K_" + key), mod=0,
+                                             unicode="", scancode=0))
+        if frame >= frames:
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+    cwd = os.getcwd()
+    # main loads its assets relative to the repository root
+    os.chdir(os.path.dirname(here))
+    pygame.event.get, pygame.time.Clock = scripted, UncappedClock
+    try:
+        main.main()
+    finally:
+        pygame.event.get, pygame.time.Clock = getEvents, _pygameClock
+        os.chdir(cwd)
+    return np.diff(stamps)[macroWarmup:] * 1000.0
+
+
+def runSuite(only: str = None, pattern: str = None) -> dict:
+    metrics = {}
+    if only in (None, "micro"):
+        pygame.init()
+        for name, setup in MICRO.items():
+            if pattern and pattern not in name:
+                continue
+            metrics["micro." + name] = timeCall(setup())
+            print(f"  {name:<32}{metrics['micro.' + name]:>10.4f} ms", flush=True)
+    if only in (None, "macro"):
+        for name, (frames, keys) in MACRO.items():
+            if pattern and pattern not in name:
+                continue
+            frameMs = runScenario(frames, keys)
+            metrics[f"macro.{name}.mean"] = float(frameMs.mean())
+            metrics[f"macro.{name}.p95"] = float(np.percentile(frameMs, 95))
+            print(f"  {name:<32}{frameMs.mean():>10.4f} ms mean", flush=True)
+    return metrics
+
+
+def gitRevision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def saveBaseline(path: str, metrics: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {"version": baselineVersion, "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "revision": gitRevision(),
+                "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                            "python": platform.python_version(), "cpus": os.cpu_count()},
+                "metrics": metrics}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def loadBaseline(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != baselineVersion:
+        raise ValueError(f"Baseline {path} has version {baseline.get('version')}, expected {baselineVersion}")
+    return baseline
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float) -> list:
+    """Print current vs baseline; returns the metrics slower than baseline * (1 + tolerance)."""
+    regressions = []
+    reference = baseline["metrics"]
+    print(f"\n{'metric':<40}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, value in metrics.items():
+        base = reference.get(name)
+        if base is None:
+            print(f"{name:<40}{'-':>12}{value:>12.4f}{'new':>9}")
+            continue
+        change = value / base - 1.0 if base > 0 else 0.0
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<40}{base:>12.4f}{value:>12.4f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=os.path.join(baselineDir, "default.json"), help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--only", choices=("micro", "macro"), help="run one kind of benchmark")
+    parser.add_argument("--filter", help="run benchmarks whose name contains this")
+    parser.add_argument("--tolerance", type=float, default=defaultTolerance,
+                        help="allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args()
+
+    metrics = runSuite(args.only, args.filter)
+    if args.save:
+        saveBaseline(args.baseline, metrics)
+        print(f"\nSaved {len(metrics)} metrics to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        # A run with nothing to compare against must not pass as "no regressions"
+        print(f"\nNo baseline at {args.baseline}; run with --save first")
+        return 2
+    regressions = compare(metrics, loadBaseline(args.baseline), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""Bullet archetype table with vectorized budgeting, culling and drawing."""
+
+import math
+from itertools import repeat
+
+import numpy as np
+import pygame
+
+import settings
+from asset_manager import assets
+from ecs import Archetype
+
+EVICTION_POLICIES = ("oldest", "farthest", "cosmetic")
+
+# Exit ticks are filed into a wheel of this many slots (a power of two)
+WHEEL_SIZE = 1024
+NEVER = np.iinfo(np.int32).max
+
+
+def circleMask(x, y, cx, cy, radius):
+    """Points inside a circle."""
+    dx = x - cx
+    dy = y - cy
+    return dx * dx + dy * dy <= radius * radius
+
+
+def sectorMask(x, y, cx, cy, radius, angle, width):
+    """Points inside a circular sector centred on `angle`, `width` radians wide."""
+    dx = x - cx
+    dy = y - cy
+    dist = np.sqrt(dx * dx + dy * dy)
+    # Projection onto the sector axis avoids a per-point atan2
+    along = dx * math.cos(angle) + dy * math.sin(angle)
+    return (dist <= radius) & (along >= math.cos(width / 2) * dist)
+
+
+def rectMask(x, y, left, top, width, height):
+    """Points inside an axis-aligned rectangle."""
+    return (x >= left) & (x <= left + width) & (y >= top) & (y <= top + height)
+
+
+class BulletBudget:
+    """
+    Live-bullet cap shared by several stores (settings.MAX_BULLETS unless
+    `limit` is given). Every spawn checks it against the live total of all
+    members at that moment, so bursts in the same tick never share headroom,
+    and makes room by evicting from any member, so a full table cannot
+    starve the others.
+    """
+    def __init__(self, limit: int = None):
+        self.limit = limit
+        self.tables = []
+
+    def add(self, table: "BulletStore") -> "BulletStore":
+        """Put a store under this budget; the budget, not the store's own limit, caps it from then on."""
+        table.budget = self
+        table.limit = table.capacity
+        self.tables.append(table)
+        return table
+
+    @property
+    def cap(self) -> int:
+        return settings.MAX_BULLETS if self.limit is None else self.limit
+
+    def live(self) -> int:
+        return sum(t.count for t in self.tables)
+
+    def evict(self, count: int) -> None:
+        """Remove `count` bullets from whichever members hold the highest eviction scores."""
+        tables = [t for t in self.tables if t.count]
+        if count <= 0 or not tables:
+            return
+        # Members tick together, so ages (and distances to the shared focus) compare across tables
+        scores = np.concatenate([t._evictionScore(t.count) for t in tables])
+        member = np.repeat(np.arange(len(tables)), [t.count for t in tables])
+        row = np.concatenate([np.arange(t.count) for t in tables])
+        total = len(scores)
+        count = min(count, total)
+        victims = np.argpartition(scores, total - count)[total - count:]
+        for i, table in enumerate(tables):
+            rows = row[victims[member[victims] == i]]
+            if len(rows):
+                table.evicted += len(rows)
+                table._removeRows(rows)
+
+
+class BulletStore(Archetype):
+    """
+    Archetype table for large bullet populations.
+    Live bullets occupy the first `count` rows: spawns append a whole burst
+    in one write, and removal fills the holes from the end of every column.
+    Extra `components` (sine, orbit, bezier, enemy) add the columns their
+    systems need.
+    A live-bullet limit (the store's own, or a BulletBudget shared with
+    other stores) and per-owner quotas are enforced on spawn by evicting
+    existing bullets according to `evictionPolicy`.
+    Rows with a non-zero `turn` home in on a target for a limited time.
+
+    With `predictExits`, the tick on which a straight-moving row leaves the
+    bounds is computed when it spawns (or stops homing) and its handle is
+    filed into a timing wheel; cull() then only touches the rows expiring
+    this tick, plus a bounds check over homing rows. Removal swaps rows in
+    from the end, so its cost scales with the rows removed.
+    """
+    def __init__(self, capacity: int = 8192, maxBullets: int = None, evictionPolicy: str = None, maxOwners: int = 256,
+                 predictExits: bool = False, bounds: tuple = None, components=(), lifetime: int = None):
+        super().__init__(("position", "velocity", "bullet", "homing") + tuple(components), capacity)
+        self.lifetime = lifetime
+        if self.has("orbit"):
+            # Orbit centres per owner, written by each emitter from its origin node
+            self.originX = np.zeros(maxOwners, dtype=np.float32)
+            self.originY = np.zeros(maxOwners, dtype=np.float32)
+
+        # Exit prediction; wheel entries are handles, since rows move on removal
+        self.exitTick = np.full(capacity, -1, dtype=np.int32)
+        self.predictExits = predictExits
+        self.bounds = bounds or (settings.WIDTH, settings.HEIGHT, settings.CULL_MARGIN)
+        self._wheel = [[] for _ in range(WHEEL_SIZE)]
+        self.homingCount = 0
+
+        # Budget enforcement
+        self.budget = None
+        self.limit = min(capacity, maxBullets if maxBullets is not None else settings.MAX_BULLETS)
+        self.evictionPolicy = evictionPolicy or settings.EVICTION_POLICY
+        if self.evictionPolicy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {self.evictionPolicy}")
+        self.quotas = np.full(maxOwners, capacity, dtype=np.int64)
+        self.ownerCounts = np.zeros(maxOwners, dtype=np.int64)
+        self.focusX = 0.0
+        self.focusY = 0.0
+        self.evicted = 0
+        self.spawned = 0
+
+        # Pre-rendered bullet sprites, indexed by the style column
+        self.styles = []
+        self._styleIds = {}
+        self._styleRadii = np.zeros(0, dtype=np.float32)
+
+    def registerStyle(self, color, radius: int) -> int:
+        """Return the style id for a bullet look, rendering its sprite once."""
+        key = (tuple(color), radius)
+        if key not in self._styleIds:
+            sprite = assets.circle(color, radius)
+            self._styleIds[key] = len(self.styles)
+            self.styles.append((sprite, radius))
+            self._styleRadii = np.append(self._styleRadii, np.float32(radius))
+        return self._styleIds[key]
+
+    def styleKeys(self) -> list:
+        """Registered (color, radius) looks, in style-id order."""
+        return list(self._styleIds)
+
+    def radii(self) -> np.ndarray:
+        """Collision radius of every live bullet, from its style."""
+        return self._styleRadii[self.style[:self.count]]
+
+    def setQuota(self, owner: int, quota: int = None) -> None:
+        """Cap one owner's live bullets (None removes the cap)."""
+        self.quotas[owner] = self.capacity if quota is None else quota
+
+    def _evictionScore(self, n: int) -> np.ndarray:
+        """Higher score = evicted first."""
+        policy = self.evictionPolicy
+        if policy == "farthest":
+            dx = self.x[:n] - self.focusX
+            dy = self.y[:n] - self.focusY
+            return dx * dx + dy * dy
+        # float64: at float32 precision the cosmetic offset would swamp small age differences
+        age = (self.tick - self.birth[:n]).astype(np.float64)
+        if policy == "cosmetic":
+            return age + self.cosmetic[:n] * 1e9
+        return age
+
+    def evict(self, count: int, owner: int = None) -> None:
+        """Remove `count` bullets (optionally only one owner's) by eviction priority."""
+        n = self.count
+        if count <= 0 or n == 0:
+            return
+        score = self._evictionScore(n)
+        if owner is not None:
+            score = np.where(self.owner[:n] == owner, score, -np.inf)
+        count = min(count, n)
+        victims = np.argpartition(score, n - count)[n - count:]
+        self.evicted += count
+        self._removeRows(victims)
+
+    def spawn(self, x, y, vx, vy, owner: int = 0, style: int = 0, cosmetic: bool = False,
+              turn=0.0, homingFrames: int = 0, **columns) -> int:
+        """
+        Append a burst in one vectorized write, evicting to stay in budget; returns how many spawned.
+        `turn` (radians per frame, scalar or per bullet) makes bullets home for `homingFrames` ticks.
+        Keyword arguments fill extra component columns (scalars or per-bullet arrays).
+        """
+        n = min(len(vx), self.limit, int(self.quotas[owner]))
+        if n <= 0:
+            return 0
+        overQuota = self.ownerCounts[owner] + n - self.quotas[owner]
+        if overQuota > 0:
+            self.evict(int(overQuota), owner)
+        overLimit = self.count + n - self.limit
+        if overLimit > 0:
+            self.evict(int(overLimit))
+        budget = self.budget
+        if budget is not None:
+            overBudget = budget.live() + n - budget.cap
+            if overBudget > 0:
+                budget.evict(int(overBudget))
+                # Only a burst larger than the whole budget is cut
+                n = min(n, budget.cap - budget.live())
+                if n <= 0:
+                    return 0
+
+        sl = self._allocate(n)
+        self.x[sl] = x if np.isscalar(x) else x[:n]
+        self.y[sl] = y if np.isscalar(y) else y[:n]
+        self.vx[sl] = vx[:n]
+        self.vy[sl] = vy[:n]
+        self.owner[sl] = owner
+        self.style[sl] = style
+        self.birth[sl] = self.tick
+        self.cosmetic[sl] = cosmetic
+        self.turn[sl] = turn if np.isscalar(turn) else turn[:n]
+        self.homingEnd[sl] = self.tick + homingFrames
+        for name, value in columns.items():
+            getattr(self, name)[sl] = value if np.isscalar(value) else value[:n]
+        self.ownerCounts[owner] += n
+        self.spawned += n
+        self.homingCount += int(np.count_nonzero(self.turn[sl] > 0))
+        if self.predictExits:
+            self._schedule(sl.start, sl.stop)
+        return n
+
+    def advance(self, start: int, frames: float) -> None:
+        """Move rows from `start` ahead by a (possibly fractional) number of frames."""
+        n = self.count
+        self.x[start:n] += self.vx[start:n] * frames
+        self.y[start:n] += self.vy[start:n] * frames
+        if self.predictExits:
+            # Earlier wheel entries go stale and are skipped when their slot comes up
+            self._schedule(start, n)
+
+    def _predict(self, rows) -> np.ndarray:
+        """Tick on which each row first lands outside the bounds, flying straight."""
+        width, height, margin = self.bounds
+        x, y, vx, vy = self.x[rows], self.y[rows], self.vx[rows], self.vy[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tx = np.where(vx > 0, (width + margin - x) / vx, np.where(vx < 0, (-margin - x) / vx, np.inf))
+            ty = np.where(vy > 0, (height + margin - y) / vy, np.where(vy < 0, (-margin - y) / vy, np.inf))
+        # First whole step strictly past the crossing, at least the next tick
+        frames = np.clip(np.floor(np.minimum(tx, ty)) + 1, 1, NEVER - self.tick - 1)
+        return (self.tick + frames).astype(np.int32)
+
+    def _schedule(self, start: int, stop: int) -> None:
+        """Predict exits for rows [start, stop) and file straight movers into the wheel."""
+        rows = np.arange(start, stop)
+        homing = self.turn[start:stop] > 0
+        handles = self.handle[start:stop]
+        self.exitTick[handles[homing]] = NEVER
+        if homing.any():
+            rows, handles = rows[~homing], handles[~homing]
+        self._file(handles, self._predict(rows))
+
+    def _file(self, handles: np.ndarray, exits: np.ndarray) -> None:
+        if len(handles) == 0:
+            return
+        self.exitTick[handles] = exits
+        slots = exits & (WHEEL_SIZE - 1)
+        order = np.argsort(slots, kind="stable")
+        slots, handles = slots[order], handles[order]
+        uniqueSlots, starts = np.unique(slots, return_index=True)
+        for slot, part in zip(uniqueSlots.tolist(), np.split(handles, starts[1:])):
+            self._wheel[slot].append(part)
+
+    def _expireDue(self) -> None:
+        """Remove rows whose predicted exit tick has come; re-file later laps."""
+        slot = self.tick & (WHEEL_SIZE - 1)
+        entries = self._wheel[slot]
+        if not entries:
+            return
+        self._wheel[slot] = []
+        handles = np.unique(np.concatenate(entries))
+        exits = self.exitTick[handles]
+        later = handles[(exits > self.tick) & (exits < NEVER) & ((exits & (WHEEL_SIZE - 1)) == slot)]
+        if len(later):
+            self._wheel[slot].append(later)
+        # Freed handles carry -1 and stale entries a different slot, so both drop out here
+        due = handles[(exits >= 0) & (exits <= self.tick)]
+        if len(due):
+            self._removeRows(self.rowOf[due])
+
+    def steer(self, tx: float, ty: float) -> None:
+        """Rotate homing bullets' velocity toward a point by at most their turn rate."""
+        if self.homingCount == 0:
+            return
+        n = self.count
+        idx = np.flatnonzero(self.turn[:n] > 0)
+        finished = self.homingEnd[idx] <= self.tick
+        if finished.any():
+            # Done homing: fly straight from here, so the exit becomes predictable
+            rows = idx[finished]
+            self.turn[rows] = 0.0
+            if self.predictExits:
+                self._file(self.handle[rows], self._predict(rows))
+            idx = idx[~finished]
+        self.homingCount = len(idx)
+        if len(idx) == 0:
+            return
+        vx, vy = self.vx[idx], self.vy[idx]
+        dx, dy = tx - self.x[idx], ty - self.y[idx]
+        # Signed angle between velocity and the line of sight, clamped to the turn rate
+        delta = np.arctan2(vx * dy - vy * dx, vx * dx + vy * dy)
+        np.clip(delta, -self.turn[idx], self.turn[idx], out=delta)
+        c, s = np.cos(delta), np.sin(delta)
+        self.vx[idx] = vx * c - vy * s
+        self.vy[idx] = vx * s + vy * c
+
+    def _onRemove(self, rows: np.ndarray) -> None:
+        self.exitTick[self.handle[rows]] = -1
+        self.ownerCounts -= np.bincount(self.owner[rows], minlength=len(self.ownerCounts))
+        self.homingCount -= int(np.count_nonzero(self.turn[rows] > 0))
+
+    def cull(self, width: int = None, height: int = None, margin: float = None) -> None:
+        """
+        Drop bullets outside the screen rectangle (the store's bounds by default).
+        With exit prediction only due rows and homing rows are examined.
+        """
+        dw, dh, dm = self.bounds
+        width = dw if width is None else width
+        height = dh if height is None else height
+        margin = dm if margin is None else margin
+        if self.predictExits:
+            self._expireDue()
+            if self.homingCount == 0:
+                return
+            rows = np.flatnonzero(self.turn[:self.count] > 0)
+            x, y = self.x[rows], self.y[rows]
+            out = (x < -margin) | (x > width + margin) | (y < -margin) | (y > height + margin)
+            self._removeRows(rows[out])
+            return
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        keep = (x >= -margin) & (x <= width + margin) & (y >= -margin) & (y <= height + margin)
+        self.compact(keep)
+
+    def cancel(self, region) -> tuple:
+        """Remove every bullet where region(x, y) is true; returns their positions."""
+        n = self.count
+        if n == 0:
+            return np.empty(0, np.float32), np.empty(0, np.float32)
+        hit = region(self.x[:n], self.y[:n])
+        xs, ys = self.x[:n][hit], self.y[:n][hit]
+        self.compact(~hit)
+        return xs, ys
+
+    def expire(self, maxAge: int) -> None:
+        """Drop rows older than `maxAge` ticks."""
+        n = self.count
+        self.compact(self.tick - self.birth[:n] < maxAge)
+
+    def countOwner(self, owner: int) -> int:
+        """Number of live bullets spawned by one emitter."""
+        return int(self.ownerCounts[owner])
+
+    def draw(self, surface: pygame.Surface, scale: float = 1.0, cheap: bool = False) -> None:
+        """
+        Blit every live bullet sprite with one blits() call per style,
+        positions and sizes times `scale`. With `cheap`, each bullet is a
+        small opaque square of its color instead of an alpha-blended circle.
+        """
+        n = self.count
+        if n == 0:
+            return
+        x, y = self.x[:n], self.y[:n]
+        if scale != 1.0:
+            x, y = x * scale, y * scale
+        keys = self.styleKeys()
+        for styleId, (sprite, radius) in enumerate(self.styles):
+            if cheap:
+                color, radius = keys[styleId]
+                size = 3 if radius * scale >= 3 else 2
+                sprite = assets.square(color, size)
+                radius = size // 2
+            elif scale != 1.0:
+                color, radius = keys[styleId]
+                radius = max(1, round(radius * scale))
+                sprite = assets.circle(color, radius)
+            if len(self.styles) == 1:
+                xs, ys = x, y
+            else:
+                mask = self.style[:n] == styleId
+                xs, ys = x[mask], y[mask]
+            dests = zip((xs - radius).astype(np.int32).tolist(), (ys - radius).astype(np.int32).tolist())
+            surface.blits(zip(repeat(sprite), dests), doreturn=False)
@@ -1,8 +1,11 @@
-"""Bullet classes and emitter system for various bullet patterns."""
+"""Emitters that spawn bullet bursts into the world's archetype tables."""
 
 import math
-import pygame
+import numpy as np
 import settings
+from functools import lru_cache
+from laser import Laser
+from transform import TransformNode
 
 # Constants
 center = (settings.WIDTH // 2, settings.HEIGHT // 2)
@@ -18,238 +21,388 @@ edgeRadius = max(settings.WIDTH, settings.HEIGHT) // 2
 emissionInterval = 30
 
 
-class Bullet:
-    """Basic straight-moving bullet."""
-    def __init__(self, x, y, vx, vy):
-        self.x, self.y = x, y
-        self.vx, self.vy = vx, vy
-
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-
-    def draw(self, surface):
-        pygame.draw.circle(surface, bulletColor, (int(self.x), int(self.y)), bulletRadius)
-
-
-class OrbitingBullet(Bullet):
-    """Bullet that orbits, then flies outward."""
-    def __init__(self, angle, targetRadius):
-        super().__init__(*center, 0, 0)
-        self.angle = angle
-        self.radius = 0
-        self.targetRadius = targetRadius
-        self.flyingOut = False
-
-    def update(self):
-        if not self.flyingOut:
-            if self.radius < self.targetRadius:
-                self.radius += orbitExpandSpeed
-            else:
-                self.angle += baseRotSpeed
-            self.x = center[0] + self.radius * math.cos(self.angle)
-            self.y = center[1] + self.radius * math.sin(self.angle)
-        else:
-            super().update()
-
-    def flyOut(self):
-        if not self.flyingOut:
-            self.flyingOut = True
-            self.vx = straightSpeed * math.cos(self.angle)
-            self.vy = straightSpeed * math.sin(self.angle)
-
-
-class SinusoidalBullet(Bullet):
-    """Bullet with sinusoidal wiggle motion."""
-    def __init__(self, angle, speed, amplitude, frequency):
-        vx = speed * math.cos(angle)
-        vy = speed * math.sin(angle)
-        super().__init__(*center, vx, vy)
-        self.perpX = -math.sin(angle)
-        self.perpY = math.cos(angle)
-        self.amplitude = amplitude
-        self.frequency = frequency
-        self.frame = 0
-
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.frame += 1
-        offset = self.amplitude * math.sin(self.frame * self.frequency)
-        self.x += self.perpX * offset
-        self.y += self.perpY * offset
+@lru_cache(maxsize=None)
+def directionTable(count, offset=0.0):
+    """Unit directions of `count` evenly spaced angles, as a read-only complex array."""
+    table = np.exp(1j * (offset + 2 * np.pi * np.arange(count) / count))
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=None)
+def curveControlTable(count, offset, radius):
+    """Bézier control and end offsets from the origin for each curve in a ring."""
+    ctrls = directionTable(count, offset) * (radius * 0.5)
+    ends = directionTable(count) * radius
+    ctrls.flags.writeable = False
+    ends.flags.writeable = False
+    return ctrls, ends
+
+
+def rotor(angle):
+    """Unit complex number that rotates a direction table by `angle`."""
+    return complex(math.cos(angle), math.sin(angle))
+
+
+orbitStep = rotor(baseRotSpeed)
+
+# Constants a tuning file may change while the game runs (see hot_reload.py)
+tunables = ("bulletRadius", "bulletColor", "straightSpeed", "baseRotSpeed", "orbitExpandSpeed",
+            "orbitCycleLimit", "sineAmplitude", "sineFrequency", "emissionInterval")
+# Tuned values (constants, emitter parameters, settings) that must be whole numbers >= 0, or above zero
+integerTunables = frozenset(("count", "travelFrames", "interval", "cycleLimit", "warmup", "bulletRadius",
+                             "orbitCycleLimit", "emissionInterval", "MAX_BULLETS", "GRID_SPACING"))
+positiveTunables = frozenset(("count", "travelFrames", "interval", "cycleLimit", "width", "bulletRadius",
+                              "orbitCycleLimit", "emissionInterval", "RENDER_SCALE", "GRID_SPACING"))
+
+
+def coerceTunable(name, value, current):
+    """`value` checked against the kind of `current`; raises ValueError when it does not fit."""
+    if isinstance(current, tuple):
+        if (not isinstance(value, (list, tuple)) or len(value) != len(current)
+                or not all(type(c) is int and 0 <= c <= 255 for c in value)):
+            raise ValueError(f"{name} must be {len(current)} integers 0-255, got {value!r}")
+        return tuple(value)
+    if isinstance(current, bool) or not isinstance(current, (int, float)):
+        if type(value) is not type(current):
+            raise ValueError(f"{name} must be {type(current).__name__}, got {value!r}")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if name in integerTunables:
+        if value != int(value) or value < 0:
+            raise ValueError(f"{name} must be a whole number >= 0, got {value!r}")
+        value = int(value)
+    if name in positiveTunables and value <= 0:
+        raise ValueError(f"{name} must be above zero, got {value!r}")
+    return value
+
+
+def retune(values):
+    """
+    Set tunable constants and what derives from them; returns the names
+    whose value changed. Raises ValueError, changing nothing, on a bad entry.
+    """
+    global orbitStep
+    unknown = set(values) - set(tunables)
+    if unknown:
+        raise ValueError(f"Unknown constants: {', '.join(sorted(unknown))}")
+    constants = globals()
+    values = {name: coerceTunable(name, value, constants[name]) for name, value in values.items()}
+    changed = []
+    for name, value in values.items():
+        if constants[name] != value:
+            constants[name] = value
+            changed.append(name)
+    orbitStep = rotor(baseRotSpeed)
+    return changed
+
+
+def bezierPlace(table, rows, t):
+    """Put table rows at parameter t along their quadratic Bézier curves."""
+    inv = 1.0 - t
+    a, b, c = inv * inv, 2.0 * inv * t, t * t
+    table.x[rows] = a * table.p0x[rows] + b * table.p1x[rows] + c * table.p2x[rows]
+    table.y[rows] = a * table.p0y[rows] + b * table.p1y[rows] + c * table.p2y[rows]
 
 
-class RotatingLineBullet:
-    """Bullet positioned along a rotating line."""
-    def __init__(self, radius, angle, speed):
-        self.radius = radius
-        self.angle = angle
-        self.speed = speed
-        self._recalc()
-
-    def _recalc(self):
-        self.x = center[0] + self.radius * math.cos(self.angle)
-        self.y = center[1] + self.radius * math.sin(self.angle)
-
-    def update(self):
-        self.angle += self.speed
-        self._recalc()
-
-    def draw(self, surface):
-        pygame.draw.circle(surface, bulletColor, (int(self.x), int(self.y)), bulletRadius)
-
-
-class CurvedBullet:
-    """Bullet that follows a Bézier curve, then flies straight."""
-    def __init__(self, p0, p1, p2, travelFrames):
-        self.p0 = p0
-        self.p1 = p1
-        self.p2 = p2
-        self.travelFrames = travelFrames
-        self.frame = 0
-        self.x, self.y = p0
-        self.vx = 0
-        self.vy = 0
-        self.flyingOut = False
+class Emitter:
+    """
+    Base emitter: spawns bursts into one of the world's bullet tables.
+    `table` names the archetype its bullets live in; the manager assigns
+    `store` to that table when the emitter is added.
+    """
+    table = "bullets"
+    # Attributes a tuning file may set on a running emitter
+    params = ("interval",)
+
+    def __init__(self, schedule=None):
+        self._timer = 0
+        self.interval = emissionInterval
+        self.intervalScale = 1
+        self.quota = None
+        self.schedule = schedule
+        self.beatDriven = False
+        # Spawn origin; EmitterManager.add() places it in the transform tree
+        self.origin = TransformNode(*center)
+        # Assigned by EmitterManager.add()
+        self.store = None
+        self.ownerId = -1
+        self.target = None
+        self._style = None
 
     def update(self):
-        self.frame += 1
-        t = min(self.frame / self.travelFrames, 1.0)
-        if t < 1.0:
-            # Quadratic Bézier interpolation
-            inv = 1 - t
-            self.x = inv*inv * self.p0[0] + 2*inv*t * self.p1[0] + t*t * self.p2[0]
-            self.y = inv*inv * self.p0[1] + 2*inv*t * self.p1[1] + t*t * self.p2[1]
-        else:
-            # Fly straight after reaching endpoint
-            if not self.flyingOut:
-                dx = self.p2[0] - self.p1[0]
-                dy = self.p2[1] - self.p1[1]
-                ang = math.atan2(dy, dx)
-                self.vx = straightSpeed * math.cos(ang)
-                self.vy = straightSpeed * math.sin(ang)
-                self.flyingOut = True
-            self.x += self.vx
-            self.y += self.vy
-
-    def draw(self, surface):
-        pygame.draw.circle(surface, bulletColor, (int(self.x), int(self.y)), bulletRadius)
+        if not self.beatDriven:
+            self._timer += 1
+            if self._timer >= self.interval * self.intervalScale:
+                self.spawn()
+                self._timer = 0
 
+    def draw(self, surface, scale=1.0):
+        """Bullets are drawn by the world's render system; emitters only draw extras."""
 
-class Emitter:
-    """Base emitter class for spawning bullets."""
-    def __init__(self):
-        self.bullets = []
-        self._timer = 0
+    def drawCheap(self, surface, scale=1.0):
+        """Degraded-quality variant of draw(); the render system draws the bullets as squares."""
+        self.draw(surface, scale)
 
-    def update(self):
-        self._timer += 1
-        if self._timer >= emissionInterval:
-            self.spawn()
-            self._timer = 0
-        # Update and cull off-screen bullets
-        alive = []
-        for b in self.bullets:
-            b.update()
-            if 0 <= b.x <= settings.WIDTH and 0 <= b.y <= settings.HEIGHT:
-                alive.append(b)
-        self.bullets = alive
-
-    def draw(self, surface):
-        for b in self.bullets:
-            b.draw(surface)
+    def styleId(self):
+        """Style of this emitter's bullets in its table, registered on first use."""
+        if self._style is None:
+            self._style = self.store.registerStyle(bulletColor, bulletRadius)
+        return self._style
 
     def spawn(self):
+        """Spawn one burst; returns how many bullets were spawned."""
         raise NotImplementedError("Subclasses must implement spawn()")
 
+    def onEnable(self):
+        """Called when the manager switches this emitter on."""
+
+    def onDisable(self):
+        """Called when the manager switches this emitter off; its bullets keep flying."""
+
+    def configure(self, values):
+        """
+        Set tunable attributes from a dict, then rebuild the caches spawn()
+        needs. Raises ValueError, changing nothing, on a bad entry.
+        """
+        unknown = set(values) - set(self.params)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        values = {name: coerceTunable(name, value, getattr(self, name)) for name, value in values.items()}
+        for name, value in values.items():
+            setattr(self, name, value)
+        self.prewarm()
+
+    def retune(self, changed):
+        """Follow module constants changed by retune(); bullets already in flight keep their values."""
+        if "emissionInterval" in changed:
+            self.interval = emissionInterval
+        if "bulletColor" in changed or "bulletRadius" in changed:
+            self._style = None
+
+    def collide(self, x, y, radius):
+        """True if a non-bullet hazard (a laser) touches a circle."""
+        return False
+
+    def liveCount(self):
+        """Number of live bullets owned by this emitter."""
+        return self.store.countOwner(self.ownerId) if self.store is not None else 0
+
+    def prewarm(self):
+        """Build any caches spawn() needs so the first burst doesn't hitch."""
+        count = getattr(self, "count", None)
+        if count:
+            directionTable(count)
+        if self.store is not None:
+            self.styleId()
+
+    def advance(self, start, frames):
+        """Move rows from `start` ahead by a (possibly fractional) number of frames."""
+        self.store.advance(start, frames)
+
+    def spawnLate(self, lateFrames):
+        """Spawn, then advance the new bullets to where they would be by now."""
+        # Spawning may evict older rows, so locate the burst from the end
+        spawned = self.spawn()
+        if lateFrames > 0 and spawned:
+            self.advance(self.store.count - spawned, lateFrames)
+
 
 class RadialEmitter(Emitter):
     """Spawns bullets uniformly in a circle."""
-    def __init__(self, count=36):
+    params = Emitter.params + ("count", "spin")
+
+    def __init__(self, count=36, spin=0.0):
         super().__init__()
         self.count = count
+        self.spin = spin
+        self.rotation = 0.0
 
     def spawn(self):
-        for i in range(self.count):
-            angle = 2 * math.pi * i / self.count
-            vx = straightSpeed * math.cos(angle)
-            vy = straightSpeed * math.sin(angle)
-            self.bullets.append(Bullet(*center, vx, vy))
+        origin = self.origin
+        v = directionTable(self.count) * (rotor(self.rotation) * origin.worldRotor * straightSpeed)
+        self.rotation += self.spin
+        return self.store.spawn(origin.worldX, origin.worldY, v.real, v.imag, self.ownerId, self.styleId())
 
 
 class OrbitingEmitter(Emitter):
     """Spawns orbiting bullets that eventually fly out."""
+    table = "orbit"
+    params = Emitter.params + ("count", "targetRadius", "cycleLimit")
+
     def __init__(self, count=36, targetRadius=100, cycleLimit=orbitCycleLimit):
         super().__init__()
         self.count = count
         self.targetRadius = targetRadius
         self.cycleLimit = cycleLimit
         self._emissions = 0
+        self._still = np.zeros(count)
+
+    def configure(self, values):
+        super().configure(values)
+        self._still = np.zeros(self.count)
+
+    def retune(self, changed):
+        super().retune(changed)
+        if "orbitCycleLimit" in changed:
+            self.cycleLimit = orbitCycleLimit
+
+    def onDisable(self):
+        # Nothing would release the current orbits any more, so they fly out now
+        self.flyOut()
+        self._emissions = 0
+
+    def update(self):
+        # Orbits follow the origin node while the emitter runs
+        self.store.originX[self.ownerId] = self.origin.worldX
+        self.store.originY[self.ownerId] = self.origin.worldY
+        super().update()
 
     def spawn(self):
-        for i in range(self.count):
-            angle = 2 * math.pi * i / self.count
-            self.bullets.append(OrbitingBullet(angle, self.targetRadius))
+        store = self.store
+        origin = self.origin
+        d = directionTable(self.count) * origin.worldRotor
+        spawned = store.spawn(origin.worldX, origin.worldY, self._still, self._still, self.ownerId, self.styleId(),
+                              dirX=d.real, dirY=d.imag, orbitRadius=0.0, targetRadius=self.targetRadius,
+                              orbiting=True)
         self._emissions += 1
         if self._emissions >= self.cycleLimit:
-            for b in self.bullets:
-                if isinstance(b, OrbitingBullet) and not b.flyingOut:
-                    b.flyOut()
+            self.flyOut()
             self._emissions = 0
+        return spawned
+
+    def flyOut(self):
+        """Release every orbiting bullet of this emitter outward."""
+        store = self.store
+        n = store.count
+        rows = np.flatnonzero((store.owner[:n] == self.ownerId) & store.orbiting[:n])
+        store.orbiting[rows] = False
+        store.vx[rows] = straightSpeed * store.dirX[rows]
+        store.vy[rows] = straightSpeed * store.dirY[rows]
+
+    def advance(self, start, frames):
+        store = self.store
+        sl = slice(start, store.count)
+        radius = store.orbitRadius[sl]
+        radius = np.minimum(radius + orbitExpandSpeed * frames, np.maximum(radius, store.targetRadius[sl]))
+        store.orbitRadius[sl] = radius
+        store.x[sl] = store.originX[self.ownerId] + radius * store.dirX[sl]
+        store.y[sl] = store.originY[self.ownerId] + radius * store.dirY[sl]
 
 
 class SineEmitter(Emitter):
     """Spawns bullets with sinusoidal movement."""
-    def __init__(self, count=36, amplitude=sineAmplitude, frequency=sineFrequency):
+    table = "sine"
+    params = Emitter.params + ("count", "amplitude", "frequency", "spin")
+
+    def __init__(self, count=36, amplitude=sineAmplitude, frequency=sineFrequency, spin=0.0):
         super().__init__()
         self.count = count
         self.amplitude = amplitude
         self.frequency = frequency
+        self.spin = spin
+        self.rotation = 0.0
+
+    def retune(self, changed):
+        super().retune(changed)
+        if "sineAmplitude" in changed:
+            self.amplitude = sineAmplitude
+        if "sineFrequency" in changed:
+            self.frequency = sineFrequency
 
     def spawn(self):
-        for i in range(self.count):
-            angle = 2 * math.pi * i / self.count
-            self.bullets.append(SinusoidalBullet(angle, straightSpeed, self.amplitude, self.frequency))
+        origin = self.origin
+        d = directionTable(self.count) * (rotor(self.rotation) * origin.worldRotor)
+        self.rotation += self.spin
+        return self.store.spawn(origin.worldX, origin.worldY, d.real * straightSpeed, d.imag * straightSpeed,
+                                self.ownerId, self.styleId(), perpX=-d.imag, perpY=d.real,
+                                amplitude=self.amplitude, frequency=self.frequency, phase=0.0)
+
+    def advance(self, start, frames):
+        # The wiggle is zero at spawn, so a late burst only needs its straight motion
+        super().advance(start, frames)
+        self.store.phase[start:self.store.count] += frames
 
 
 class RotatingLineEmitter(Emitter):
-    """Spawns bullets along a rotating line."""
-    def __init__(self, count=36, radius=edgeRadius, speedMul=3):
+    """A rotating two-sided laser through the origin, telegraphed before it turns on."""
+    table = None
+    params = Emitter.params + ("speedMul", "width", "warmup")
+
+    def __init__(self, radius=edgeRadius, speedMul=3, width=16, warmup=45):
         super().__init__()
-        self.count = count * 2
-        self.radius = radius
-        self.speed = baseRotSpeed * speedMul
-        self.lineAngle = 0
+        self.speedMul = speedMul
+        self.width = width
+        self.warmup = warmup
+        self.laser = Laser(radius, width, spin=baseRotSpeed * speedMul, warmup=warmup, origin=self.origin)
+
+    def configure(self, values):
+        super().configure(values)
+        laser = self.laser
+        laser.width, laser.warmup = self.width, self.warmup
+        laser.spin = baseRotSpeed * self.speedMul
+
+    def retune(self, changed):
+        super().retune(changed)
+        self.laser.spin = baseRotSpeed * self.speedMul
+
+    def onEnable(self):
+        self.laser.reset()
 
     def update(self):
-        self.lineAngle += self.speed
-        super().update()
+        self.laser.update()
 
     def spawn(self):
-        self.bullets.clear()
-        for i in range(self.count):
-            t = -1 + (2 * i) / (self.count - 1)
-            r = abs(t) * self.radius
-            angle = self.lineAngle + (0 if t >= 0 else math.pi)
-            self.bullets.append(RotatingLineBullet(r, angle, self.speed))
+        self.laser.reset()
+        return 0
+
+    def spawnLate(self, lateFrames):
+        self.spawn()
+
+    def collide(self, x, y, radius):
+        return self.laser.hits(x, y, radius)
+
+    def draw(self, surface, scale=1.0):
+        self.laser.draw(surface, scale)
+
+    def drawCheap(self, surface, scale=1.0):
+        self.laser.drawCheap(surface, scale)
 
 
 class CurveEmitter(Emitter):
     """Spawns bullets along Bézier curves."""
+    table = "curve"
+    params = Emitter.params + ("count", "radius", "travelFrames", "ctrlOffset")
+
     def __init__(self, count=24, radius=edgeRadius, travelFrames=60, ctrlAngleOffset=math.pi / 4):
         super().__init__()
         self.count = count
         self.radius = radius
         self.travelFrames = travelFrames
         self.ctrlOffset = ctrlAngleOffset
+        self._still = np.zeros(count)
+
+    def configure(self, values):
+        super().configure(values)
+        self._still = np.zeros(self.count)
+
+    def prewarm(self):
+        curveControlTable(self.count, self.ctrlOffset, self.radius)
+        super().prewarm()
 
     def spawn(self):
-        for i in range(self.count):
-            angle = 2 * math.pi * i / self.count
-            p0 = center
-            p2 = (center[0] + self.radius * math.cos(angle), center[1] + self.radius * math.sin(angle))
-            midRadius = self.radius * 0.5
-            ctrl = angle + self.ctrlOffset
-            p1 = (center[0] + midRadius * math.cos(ctrl), center[1] + midRadius * math.sin(ctrl))
-            self.bullets.append(CurvedBullet(p0, p1, p2, self.travelFrames))
+        ox, oy = self.origin.worldX, self.origin.worldY
+        rot = self.origin.worldRotor
+        ctrls, ends = curveControlTable(self.count, self.ctrlOffset, self.radius)
+        p1 = complex(ox, oy) + ctrls * rot
+        p2 = complex(ox, oy) + ends * rot
+        return self.store.spawn(ox, oy, self._still, self._still, self.ownerId, self.styleId(),
+                                p0x=ox, p0y=oy, p1x=p1.real, p1y=p1.imag, p2x=p2.real, p2y=p2.imag,
+                                frame=0.0, travelFrames=self.travelFrames)
+
+    def advance(self, start, frames):
+        store = self.store
+        rows = np.arange(start, store.count)
+        store.frame[rows] += frames
+        bezierPlace(store, rows, np.minimum(store.frame[rows] / store.travelFrames[rows], 1.0))
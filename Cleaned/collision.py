@@ -0,0 +1,153 @@
+"""Batched circle collision: broadcasting for small sets, a spatial hash for large ones."""
+
+import numpy as np
+
+from event_bus import EventBus
+
+# Event topics published on the bus
+SHOT_HITS = "collision.shotHits"
+SHOTS_CANCELLED = "collision.shotsCancelled"
+
+# Above this many shot x bullet pairs, candidates come from the spatial hash
+broadcastLimit = 4096
+shotDamage = 10
+
+
+class ShotHits:
+    """One tick's damage per hitbox entity (by handle), published as a single event."""
+    __slots__ = ("table", "handles", "damage", "shots")
+
+    def __init__(self, table, handles, damage, shots):
+        self.table = table
+        self.handles = handles
+        self.damage = damage
+        self.shots = shots
+
+
+def circleHits(ax, ay, ar, bx, by, br) -> np.ndarray:
+    """(len(a), len(b)) mask of overlapping circles, by broadcasting."""
+    dx = ax[:, None] - bx[None, :]
+    dy = ay[:, None] - by[None, :]
+    reach = ar[:, None] + br[None, :]
+    return dx * dx + dy * dy <= reach * reach
+
+
+class SpatialHash:
+    """
+    Uniform grid over points, rebuilt each tick by sorting cell keys.
+    Queries look up the 3x3 cells around each probe with searchsorted,
+    so both building and querying stay vectorized.
+    """
+    def __init__(self, cellSize: float = 32.0):
+        self.cellSize = cellSize
+        self.order = np.empty(0, dtype=np.intp)
+        self.keys = np.empty(0, dtype=np.int64)
+
+    def _key(self, cx, cy):
+        return (cx.astype(np.int64) << 32) + cy.astype(np.int64)
+
+    def build(self, x, y) -> None:
+        cx = np.floor(x / self.cellSize)
+        cy = np.floor(y / self.cellSize)
+        keys = self._key(cx, cy)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def candidates(self, qx, qy):
+        """(probeIndex, pointIndex) pairs sharing a neighbourhood; probe radii must not exceed a cell."""
+        cx = np.floor(qx / self.cellSize)
+        cy = np.floor(qy / self.cellSize)
+        offsets = np.arange(-1, 2)
+        nx = (cx[:, None, None] + offsets[None, :, None]).repeat(3, axis=2).reshape(len(qx), 9)
+        ny = (cy[:, None, None] + offsets[None, None, :]).repeat(3, axis=1).reshape(len(qx), 9)
+        keys = self._key(nx, ny).ravel()
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        # Expand each [lo, hi) run into sorted positions
+        probes = np.repeat(np.arange(len(keys)) // 9, counts)
+        starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        positions = starts + np.arange(total)
+        return probes, self.order[positions]
+
+
+def collidePairs(ax, ay, ar, bx, by, br, grid: SpatialHash = None):
+    """Indices (i, j) of overlapping circles between sets a and b."""
+    if len(ax) == 0 or len(bx) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    if grid is None or len(ax) * len(bx) <= broadcastLimit:
+        return np.nonzero(circleHits(ax, ay, ar, bx, by, br))
+    grid.build(bx, by)
+    i, j = grid.candidates(ax, ay)
+    dx = ax[i] - bx[j]
+    dy = ay[i] - by[j]
+    reach = ar[i] + br[j]
+    hit = dx * dx + dy * dy <= reach * reach
+    return i[hit], j[hit]
+
+
+class ShotCollider:
+    """
+    Player-shot collision system, run once per tick by the world.
+    The "shots" table is tested against every hitbox table and, optionally,
+    against enemy bullet tables, whose bullets the shots cancel. A shot is
+    consumed by its first hit; damage is summed per entity and reported as
+    one event per hitbox table per tick.
+    """
+    def __init__(self, bus: EventBus = None, damage: float = shotDamage, cancelBullets: bool = True, cellSize: float = 32.0):
+        self.bus = bus
+        self.damage = damage
+        self.cancelBullets = cancelBullets
+        self.grid = SpatialHash(cellSize)
+        self.cancelled = 0
+
+    def __call__(self, world) -> None:
+        shots = world.tables.get("shots")
+        if shots is not None:
+            self.update(shots, world.query("hitbox"), world.query("bullet", "enemy"))
+
+    def update(self, shots, hitboxTables, enemyTables=()) -> None:
+        n = shots.count
+        if n == 0:
+            return
+        sx, sy = shots.x[:n], shots.y[:n]
+        sr = shots.radii()
+        consumed = np.zeros(n, dtype=bool)
+
+        for table in hitboxTables:
+            m = table.count
+            if m == 0:
+                continue
+            hit = circleHits(sx, sy, sr, table.x[:m], table.y[:m], table.hitRadius[:m]) & ~consumed[:, None]
+            # Each shot damages only the first entity it touches
+            struck = hit.any(axis=1)
+            if not struck.any():
+                continue
+            counts = np.bincount(hit.argmax(axis=1)[struck], minlength=m)
+            damage = counts * np.float32(self.damage)
+            np.maximum(table.hp[:m] - damage, 0.0, out=table.hp[:m])
+            consumed |= struck
+            if self.bus is not None:
+                self.bus.publish(SHOT_HITS, ShotHits(table, table.handle[:m].copy(), damage, counts))
+
+        if self.cancelBullets:
+            for table in enemyTables:
+                m = table.count
+                live = np.flatnonzero(~consumed)
+                if m == 0 or len(live) == 0:
+                    continue
+                i, j = collidePairs(sx[live], sy[live], sr[live], table.x[:m], table.y[:m], table.radii(), self.grid)
+                if len(j) == 0:
+                    continue
+                victims = np.unique(j)
+                table.remove(table.handle[victims])
+                consumed[live[i]] = True
+                self.cancelled += len(victims)
+                if self.bus is not None:
+                    self.bus.publish(SHOTS_CANCELLED, len(victims))
+
+        if consumed.any():
+            shots.compact(~consumed)
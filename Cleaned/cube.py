@@ -85,6 +85,7 @@ class CubeRenderer:
         self.baseSize = baseSize
         self.amplitude = amplitude
         self.pulseSpeed = pulseSpeed
+        self.antialias = True
         self.edges = [
             (0, 1), (0, 2), (0, 4), (1, 3), (1, 5), (2, 3),
             (2, 6), (3, 7), (4, 5), (4, 6), (5, 7), (6, 7)
@@ -104,17 +105,23 @@ class CubeRenderer:
             for z in (-size, size)
         ]
 
+    def onAudioFrame(self, frame) -> None:
+        """Pulse the cube size with the smoothed kick amplitude."""
+        self.baseSize = 10 * frame.amplitude + 5
+
     def update(self, dt: float) -> None:
         """Update rotation."""
         self.rotation.update(dt)
 
-    def draw(self, surface: pygame.Surface) -> None:
-        """Draw the cube."""
+    def draw(self, surface: pygame.Surface, scale: float = 1.0) -> None:
+        """Draw the cube, positions and sizes times `scale`."""
         vertices = self.getVertices()
         rotated = self.rotation.rotatePoints(vertices)
+        center = (self.center[0] * scale, self.center[1] * scale)
         projected = [
-            projectPerspective(p, self.center, fov=400, zOffset=200)
+            projectPerspective(p, center, fov=400 * scale, zOffset=200)
             for p in rotated
         ]
+        drawLine = pygame.draw.aaline if self.antialias else pygame.draw.line
         for i, j in self.edges:
-            pygame.draw.aaline(surface, (100, 255, 200), projected[i], projected[j])
+            drawLine(surface, (100, 255, 200), projected[i], projected[j])
@@ -0,0 +1,159 @@
+"""Archetype-based entity-component-system core: components as NumPy columns, systems over tables."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Component name -> the columns it contributes; tag components have none
+COMPONENTS = {
+    "position": (("x", np.float32), ("y", np.float32)),
+    "velocity": (("vx", np.float32), ("vy", np.float32)),
+    "bullet": (("owner", np.int16), ("style", np.uint8), ("birth", np.int32), ("cosmetic", bool)),
+    "homing": (("turn", np.float32), ("homingEnd", np.int32)),
+    "sine": (("perpX", np.float32), ("perpY", np.float32), ("amplitude", np.float32),
+             ("frequency", np.float32), ("phase", np.float32)),
+    "orbit": (("dirX", np.float32), ("dirY", np.float32), ("orbitRadius", np.float32),
+              ("targetRadius", np.float32), ("orbiting", bool)),
+    "bezier": (("p0x", np.float32), ("p0y", np.float32), ("p1x", np.float32), ("p1y", np.float32),
+               ("p2x", np.float32), ("p2y", np.float32), ("frame", np.float32), ("travelFrames", np.float32)),
+    "hitbox": (("hitRadius", np.float32), ("hp", np.float32)),
+    "enemy": (),
+}
+
+
+class Archetype:
+    """
+    Table of entities that share one set of components.
+    Every component column is a contiguous NumPy array exposed as an
+    attribute; live entities occupy the first `count` rows. Removal moves
+    rows from the end into the holes, and stable handles (`rowOf`) let
+    outside code find an entity after it has moved.
+    """
+    def __init__(self, components, capacity: int = 1024):
+        self.components = frozenset(components)
+        self.capacity = capacity
+        self.count = 0
+        self.tick = 0
+        self._columns = []
+        for component in components:
+            for name, dtype in COMPONENTS[component]:
+                column = np.zeros(capacity, dtype=dtype)
+                setattr(self, name, column)
+                self._columns.append(column)
+        self.handle = np.zeros(capacity, dtype=np.int32)
+        self._columns.append(self.handle)
+        self.rowOf = np.zeros(capacity, dtype=np.int32)
+        self._free = np.arange(capacity, dtype=np.int32)[::-1].copy()
+        self._freeTop = capacity
+
+    def has(self, *components) -> bool:
+        """True if the table carries every named component."""
+        return self.components.issuperset(components)
+
+    def _allocate(self, n: int) -> slice:
+        """Reserve `n` rows at the end, with fresh handles; returns their slice."""
+        sl = slice(self.count, self.count + n)
+        handles = self._free[self._freeTop - n:self._freeTop]
+        self._freeTop -= n
+        self.handle[sl] = handles
+        self.rowOf[handles] = np.arange(sl.start, sl.stop, dtype=np.int32)
+        self.count += n
+        return sl
+
+    def _onRemove(self, rows: np.ndarray) -> None:
+        """Hook for bookkeeping on rows about to be removed."""
+
+    def _removeRows(self, rows: np.ndarray) -> None:
+        """Remove distinct live rows by moving surviving rows from the end into the holes."""
+        m = len(rows)
+        if m == 0:
+            return
+        n = self.count
+        k = n - m
+        inTail = np.zeros(m, dtype=bool)
+        inTail[rows[rows >= k] - k] = True
+        holes = rows[rows < k]
+        movers = np.arange(k, n)[~inTail]
+
+        self._onRemove(rows)
+        released = self.handle[rows]
+        self._free[self._freeTop:self._freeTop + m] = released
+        self._freeTop += m
+
+        for col in self._columns:
+            col[holes] = col[movers]
+        self.rowOf[self.handle[holes]] = holes
+        self.count = k
+
+    def remove(self, handles) -> None:
+        """Remove entities by handle."""
+        self._removeRows(self.rowOf[np.asarray(handles, dtype=np.int32)])
+
+    def compact(self, keep: np.ndarray) -> None:
+        """Keep only the rows selected by a boolean mask over live entities."""
+        self._removeRows(np.flatnonzero(~keep))
+
+
+class World:
+    """
+    Named archetype tables plus the systems that update and draw them.
+    Systems are callables taking the world (and the surface, for renderers)
+    and run in the order they were added. With `threads` > 0, systems can
+    hand per-table (or per-chunk) kernels to a persistent thread pool
+    through `parallel`; NumPy releases the GIL inside the kernels.
+    """
+    def __init__(self, threads: int = 0, chunkSize: int = 4096):
+        self.tables = {}
+        self.systems = []
+        self.renderers = []
+        self.target = None
+        self.chunkSize = chunkSize
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="world") if threads > 0 else None
+
+    def addTable(self, name: str, table: Archetype) -> Archetype:
+        self.tables[name] = table
+        return table
+
+    def query(self, *components):
+        """Tables carrying every named component."""
+        return [t for t in self.tables.values() if t.has(*components)]
+
+    def addSystem(self, system) -> None:
+        self.systems.append(system)
+
+    def addRenderer(self, renderer) -> None:
+        self.renderers.append(renderer)
+
+    def chunks(self, n: int) -> list:
+        """Row slices covering `n` live rows, split into `chunkSize` pieces when running threaded."""
+        if n == 0:
+            return []
+        if self.pool is None:
+            return [slice(0, n)]
+        return [slice(i, min(i + self.chunkSize, n)) for i in range(0, n, self.chunkSize)]
+
+    def parallel(self, jobs) -> None:
+        """Run independent callables, on the pool if there is one; returns once all have finished."""
+        if self.pool is None or len(jobs) < 2:
+            for job in jobs:
+                job()
+            return
+        for future in [self.pool.submit(job) for job in jobs]:
+            future.result()
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def update(self) -> None:
+        for system in self.systems:
+            system(self)
+
+    def draw(self, surface, scale: float = 1.0, cheap: bool = False) -> None:
+        for renderer in self.renderers:
+            renderer(self, surface, scale, cheap)
+
+    def count(self, *components) -> int:
+        """Live entities across the tables carrying the named components."""
+        return sum(t.count for t in self.query(*components))
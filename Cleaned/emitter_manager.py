@@ -1,51 +1,292 @@
 """Manager for controlling multiple bullet emitters."""
 
-from bullet_system import *
+import math
+import time
+
+import numpy as np
+import settings
+import bullet_system
+from bullet_system import CurveEmitter, OrbitingEmitter, RadialEmitter, RotatingLineEmitter, SineEmitter, edgeRadius
+from beat_schedule import BeatSchedule, BeatScheduler
+from bullet_store import BulletBudget, BulletStore, circleMask, rectMask, sectorMask
+from ecs import Archetype, World
+from frame_budget import FrameBudget
+from transform import TransformNode, TransformTree
+from patterns import CompiledPattern, PatternEmitter, loadPatterns
+from systems import (bezierSystem, cullSystem, homingSystem, itemColor, itemPopSpeed, lifetimeSystem,
+                     movementSystem, orbitSystem, particleColor, particleLifetime, pickupSystem, renderSystem,
+                     sineSystem)
 
 
 class EmitterManager:
-    """Manages multiple emitters and their active states."""
-    def __init__(self):
+    """
+    Manages multiple emitters and their active states, and owns the world
+    whose archetype tables hold every bullet, pickup, particle and boss.
+    """
+    def __init__(self, capacity=8192, kindCapacity=2048, threads=None):
         self.emitters = {}
         self.active = {}
+        self.scheduler = None
+        self._names = {}
+        self.target = None
+        self._rng = np.random.default_rng()
+
+        # Tables are drawn in the order they are added
+        world = self.world = World(settings.SIM_THREADS if threads is None else threads, settings.SIM_CHUNK_SIZE)
+        self.particles = world.addTable("particles", BulletStore(2048, maxBullets=2048, lifetime=particleLifetime))
+        self.store = world.addTable("bullets", BulletStore(capacity, predictExits=True, components=("enemy",)))
+        world.addTable("sine", BulletStore(kindCapacity, components=("sine", "enemy")))
+        world.addTable("orbit", BulletStore(kindCapacity, components=("orbit", "enemy")))
+        world.addTable("curve", BulletStore(kindCapacity, components=("bezier", "enemy")))
+        # Cancelled bullets turn into score items or short-lived particles
+        self.items = world.addTable("items", BulletStore(
+            2048, maxBullets=2048, bounds=(settings.WIDTH, settings.HEIGHT, 40)))
+        world.addTable("bosses", Archetype(("position", "hitbox", "enemy"), capacity=8))
+        self.items.registerStyle(itemColor, 5)
+        self.particles.registerStyle(particleColor, 2)
+        for system in (homingSystem, orbitSystem, bezierSystem, movementSystem, sineSystem,
+                       pickupSystem, lifetimeSystem, cullSystem):
+            world.addSystem(system)
+        world.addRenderer(renderSystem)
+        self.enemyTables = world.query("bullet", "enemy")
+        # settings.MAX_BULLETS caps the enemy tables together, checked on every spawn
+        self.bulletBudget = BulletBudget()
+        for table in self.enemyTables:
+            self.bulletBudget.add(table)
+
+        # Emitters without a rig hang off a node at the playfield center
+        self.transforms = TransformTree()
+        self.centerNode = self.transforms.attach(TransformNode(settings.WIDTH / 2, settings.HEIGHT / 2, name="center"))
+        # Rolling per-emitter cost in milliseconds
+        self.budget = FrameBudget()
+        self.updateCost = {}
+        self.drawCost = {}
+        self.costSmoothing = 0.1
 
-    def add(self, name, emitter, initiallyActive=False):
-        """Add an emitter to the manager."""
+    def add(self, name, emitter, initiallyActive=False, schedule=None, quota=None):
+        """Add an emitter to the manager, optionally on a beat schedule and with a live-bullet quota."""
         self.emitters[name] = emitter
         self.active[name] = initiallyActive
+        self._names[id(emitter)] = name
+        emitter.ownerId = len(self._names) - 1
+        emitter.target = self.target
+        emitter.quota = quota
+        if emitter.table is not None:
+            emitter.store = self.world.tables[emitter.table]
+            emitter.store.setQuota(emitter.ownerId, quota)
+        emitter.origin.setPosition(0.0, 0.0)
+        self.transforms.attach(emitter.origin, self.centerNode)
+        if schedule is not None:
+            emitter.schedule = schedule
+        if self.scheduler and emitter.schedule:
+            self.scheduler.add(emitter)
+
+    def setBeatGrid(self, grid, maxBurstsPerTick=2):
+        """Drive every emitter that has a schedule from a beat grid."""
+        self.scheduler = BeatScheduler(grid, maxBurstsPerTick)
+        for em in self.emitters.values():
+            if em.schedule:
+                self.scheduler.add(em)
+
+    def setTarget(self, target):
+        """Give every emitter the object aimed patterns track (the player)."""
+        self.target = target
+        self.world.target = target
+        for em in self.emitters.values():
+            em.target = target
+
+    def _isActive(self, emitter):
+        return self.active.get(self._names.get(id(emitter)), False)
+
+    def attachEmitter(self, name, parent=None, x=0.0, y=0.0):
+        """Move an emitter's origin under another node (a boss or arm), at a local offset."""
+        origin = self.emitters[name].origin
+        origin.setPosition(x, y)
+        self.transforms.attach(origin, parent if parent is not None else self.centerNode)
+
+    def prewarm(self, name):
+        """Build an emitter's spawn caches ahead of its first use."""
+        if name in self.emitters:
+            self.emitters[name].prewarm()
 
     def enable(self, name):
         """Enable an emitter."""
         if name in self.active:
+            if not self.active[name]:
+                self.emitters[name].onEnable()
             self.active[name] = True
 
     def disable(self, name):
         """Disable an emitter."""
         if name in self.active:
+            if self.active[name]:
+                self.emitters[name].onDisable()
             self.active[name] = False
 
     def toggle(self, name):
         """Toggle an emitter."""
         if name in self.active:
-            self.active[name] = not self.active[name]
+            if self.active[name]:
+                self.disable(name)
+            else:
+                self.enable(name)
+
+    def _recordCost(self, costs, name, seconds):
+        ms = seconds * 1000.0
+        costs[name] = costs.get(name, ms) + (ms - costs.get(name, ms)) * self.costSmoothing
 
-    def update(self):
-        """Update all active emitters."""
+    def update(self, songTime=None):
+        """Fire beat-scheduled spawns, then update all active emitters, timing each."""
+        scale = 2 if self.budget.active("throttleSpawns") else 1
+        clock = time.perf_counter
+        if self.target is not None:
+            for table in self.enemyTables:
+                table.focusX, table.focusY = self.target.x, self.target.y
+
+        # World transforms are computed once per tick, before any spawn reads them
+        self.transforms.update()
+        if self.scheduler and songTime is not None:
+            self.scheduler.update(songTime, self._isActive)
         for name, em in self.emitters.items():
+            em.intervalScale = scale
             if self.active.get(name, False):
+                start = clock()
                 em.update()
+                self._recordCost(self.updateCost, name, clock() - start)
+                if self.target is not None and em.collide(self.target.x, self.target.y, self.target.radius):
+                    self.target.hit()
+        # Bullets keep flying after their emitter is disabled
+        start = clock()
+        self.world.update()
+        self._recordCost(self.updateCost, "world", clock() - start)
 
-    def draw(self, surface):
-        """Draw all active emitters."""
+    def draw(self, surface, scale: float = 1.0):
+        """Draw all active emitters, cheaply when the budget demands it."""
+        cheap = self.budget.active("cheapBullets")
+        clock = time.perf_counter
         for name, em in self.emitters.items():
             if self.active.get(name, False):
-                em.draw(surface)
+                start = clock()
+                if cheap:
+                    em.drawCheap(surface, scale)
+                else:
+                    em.draw(surface, scale)
+                self._recordCost(self.drawCost, name, clock() - start)
+        start = clock()
+        self.world.draw(surface, scale, cheap)
+        self._recordCost(self.drawCost, "world", clock() - start)
+
+    def cancel(self, region, convert=None):
+        """
+        Remove every enemy bullet where region(x, y) is true, optionally
+        converting them to "items" or "particles"; returns how many were removed.
+        """
+        parts = [table.cancel(region) for table in self.enemyTables]
+        xs = np.concatenate([p[0] for p in parts])
+        ys = np.concatenate([p[1] for p in parts])
+        n = len(xs)
+        if n and convert == "items":
+            self.items.spawn(xs, ys, np.zeros(n, np.float32), np.full(n, -itemPopSpeed, np.float32))
+        elif n and convert == "particles":
+            angles = self._rng.uniform(0.0, 2 * math.pi, n)
+            speeds = self._rng.uniform(1.0, 3.0, n)
+            self.particles.spawn(xs, ys, np.cos(angles) * speeds, np.sin(angles) * speeds)
+        return n
+
+    def cancelCircle(self, cx, cy, radius, convert=None):
+        """Cancel bullets inside a circle (bombs)."""
+        return self.cancel(lambda x, y: circleMask(x, y, cx, cy, radius), convert)
+
+    def cancelSector(self, cx, cy, radius, angle, width, convert=None):
+        """Cancel bullets inside a sector (sword parries)."""
+        return self.cancel(lambda x, y: sectorMask(x, y, cx, cy, radius, angle, width), convert)
+
+    def cancelRect(self, left, top, width, height, convert=None):
+        """Cancel bullets inside a rectangle."""
+        return self.cancel(lambda x, y: rectMask(x, y, left, top, width, height), convert)
+
+    def cancelAll(self, convert=None):
+        """Cancel every enemy bullet (phase clears)."""
+        return self.cancel(lambda x, y: np.ones(len(x), dtype=bool), convert)
+
+    def emitterCounts(self):
+        """Live bullets per emitter, including bullets of disabled emitters still in flight."""
+        return {name: em.liveCount() for name, em in self.emitters.items()}
+
+    def activeEmitters(self):
+        """Names of the emitters currently enabled."""
+        return [name for name in self.emitters if self.active.get(name, False)]
+
+    def retune(self, constants=None, emitterParams=None):
+        """
+        Apply hot-reloaded tuning: bullet_system constants, then parameters of
+        named emitters. Returns notices about anything that was rejected.
+        """
+        notices = []
+        changed = []
+        try:
+            changed = bullet_system.retune(constants or {})
+        except (TypeError, ValueError) as e:
+            notices.append(f"Tuning: {e}")
+        for em in self.emitters.values():
+            em.retune(changed)
+
+        emitterParams = emitterParams or {}
+        for name in emitterParams:
+            if name not in self.emitters:
+                notices.append(f"Tuning: no emitter named {name}")
+        configured = {name: values for name, values in emitterParams.items() if name in self.emitters}
+        reshaped = False
+        for name, values in configured.items():
+            em = self.emitters[name]
+            shape = (getattr(em, "count", None), getattr(em, "radius", None), getattr(em, "ctrlOffset", None))
+            try:
+                em.configure(values)
+            except (TypeError, ValueError) as e:
+                notices.append(f"Tuning {name}: {e}")
+            # Only a new burst shape makes the cached direction and curve tables stale
+            reshaped |= shape != (getattr(em, "count", None), getattr(em, "radius", None),
+                                  getattr(em, "ctrlOffset", None))
+        if reshaped:
+            bullet_system.directionTable.cache_clear()
+            bullet_system.curveControlTable.cache_clear()
+            for em in self.emitters.values():
+                em.prewarm()
+        return notices
+
+    def reloadPattern(self, spec):
+        """Recompile an edited pattern into the running emitter of the same name; returns notices."""
+        try:
+            pattern = CompiledPattern(spec)
+        except (KeyError, TypeError, ValueError) as e:
+            return [f"Pattern {spec.get('name', '?')}: {e!r}"]
+        em = self.emitters.get(pattern.name)
+        if not isinstance(em, PatternEmitter):
+            return [f"Pattern {pattern.name}: new patterns are picked up on restart"]
+        em.setPattern(pattern)
+        return []
+
+    def close(self):
+        """Stop the world's worker threads."""
+        self.world.close()
+
+    def bulletCount(self):
+        """Live enemy bullets across every table."""
+        return sum(t.count for t in self.enemyTables)
+
+    def spawnedCount(self):
+        """Enemy bullets spawned so far across every table."""
+        return sum(t.spawned for t in self.enemyTables)
 
 
 def initEmitters(manager: EmitterManager) -> None:
     """Initialize all emitters."""
-    manager.add("straight", RadialEmitter(), initiallyActive=True)
-    manager.add("orbiting", OrbitingEmitter(), initiallyActive=False)
-    manager.add("sine", SineEmitter(), initiallyActive=False)
+    manager.add("straight", RadialEmitter(), initiallyActive=True, schedule=BeatSchedule("beat"), quota=720)
+    manager.add("orbiting", OrbitingEmitter(), initiallyActive=False, schedule=BeatSchedule("beat", every=2), quota=720)
+    manager.add("sine", SineEmitter(), initiallyActive=False, schedule=BeatSchedule("offbeat"), quota=720)
     manager.add("line", RotatingLineEmitter(), initiallyActive=False)
-    manager.add("curve", CurveEmitter(count=12, radius=edgeRadius, travelFrames=90), initiallyActive=False)
+    manager.add("curve", CurveEmitter(count=12, radius=edgeRadius, travelFrames=90), initiallyActive=False,
+                schedule=BeatSchedule("bar"), quota=240)
+    for name, pattern in loadPatterns().items():
+        schedule = BeatSchedule(**pattern.schedule) if pattern.schedule else None
+        manager.add(name, PatternEmitter(pattern), initiallyActive=False, schedule=schedule, quota=pattern.quota)
@@ -0,0 +1,33 @@
+"""Lightweight publish/subscribe bus for per-frame game events."""
+
+from typing import Any, Callable, Dict, Tuple
+
+
+class EventBus:
+    """
+    Dispatches named events to subscribed callbacks.
+    Subscriber lists are stored as tuples so publishing never allocates.
+    """
+    def __init__(self):
+        self._subscribers: Dict[str, Tuple[Callable[[Any], None], ...]] = {}
+
+    def subscribe(self, topic: str, callback: Callable[[Any], None]) -> Callable[[Any], None]:
+        """Register a callback for a topic and return it."""
+        self._subscribers[topic] = self._subscribers.get(topic, ()) + (callback,)
+        return callback
+
+    def unsubscribe(self, topic: str, callback: Callable[[Any], None]) -> None:
+        """Remove a callback from a topic."""
+        subs = self._subscribers.get(topic, ())
+        self._subscribers[topic] = tuple(cb for cb in subs if cb is not callback)
+
+    def hasSubscribers(self, topic: str) -> bool:
+        """Check whether anything listens to a topic."""
+        return bool(self._subscribers.get(topic))
+
+    def publish(self, topic: str, payload: Any = None) -> None:
+        """Send a payload to every subscriber of a topic."""
+        subs = self._subscribers.get(topic)
+        if subs:
+            for callback in subs:
+                callback(payload)
@@ -0,0 +1,50 @@
+"""Font loading with system font lookups cached between launches."""
+
+import json
+import os
+
+import pygame
+
+import settings
+
+cacheFile = "fonts.json"
+
+
+def _cachePath() -> str:
+    return os.path.join(settings.CACHE_DIR, cacheFile)
+
+
+def _readCache() -> dict:
+    try:
+        with open(_cachePath(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _writeCache(cache: dict) -> None:
+    try:
+        os.makedirs(settings.CACHE_DIR, exist_ok=True)
+        with open(_cachePath(), "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        pass
+
+
+def findFont(name: str):
+    """
+    Path of a system font, or None when it is missing (pygame's bundled
+    font is used then). Only a cache miss scans the system fonts.
+    """
+    cache = _readCache()
+    if name in cache and (cache[name] is None or os.path.exists(cache[name])):
+        return cache[name]
+    path = pygame.font.match_font(name)
+    cache[name] = path
+    _writeCache(cache)
+    return path
+
+
+def loadFont(name: str, size: int) -> pygame.font.Font:
+    """Like pygame.font.SysFont, without scanning the system fonts on every launch."""
+    return pygame.font.Font(findFont(name), size)
@@ -0,0 +1,63 @@
+"""Frame-time budget tracking with stepwise quality degradation."""
+
+from collections import deque
+from typing import Sequence
+
+import settings
+
+
+class FrameBudget:
+    """
+    Watches a rolling average of frame work time and applies degradation
+    steps one at a time while over budget, restoring them once headroom returns.
+    """
+    def __init__(self, budgetMs: float = 1000.0 / settings.FPS_TARGET,
+                 steps: Sequence[str] = settings.DEGRADATION_STEPS,
+                 window: int = 30, headroom: float = 0.75, cooldown: int = 60):
+        self.budgetMs = budgetMs
+        self.steps = tuple(steps)
+        self.window = window
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.level = 0
+        self.rollingMs = 0.0
+        self._samples = deque()
+        self._total = 0.0
+        self._sinceChange = 0
+        self._active = frozenset()
+
+    def record(self, frameMs: float) -> None:
+        """Add one frame's work time and step quality down or up if needed."""
+        samples = self._samples
+        samples.append(frameMs)
+        self._total += frameMs
+        if len(samples) > self.window:
+            self._total -= samples.popleft()
+        self.rollingMs = self._total / len(samples)
+        self._sinceChange += 1
+
+        if self._sinceChange < self.cooldown or len(samples) < self.window:
+            return
+        if self.rollingMs > self.budgetMs and self.level < len(self.steps):
+            self._setLevel(self.level + 1)
+        elif self.rollingMs < self.budgetMs * self.headroom and self.level > 0:
+            self._setLevel(self.level - 1)
+
+    def _setLevel(self, level: int) -> None:
+        self.level = level
+        self._active = frozenset(self.steps[:level])
+        self._sinceChange = 0
+
+    def setLevel(self, level: int) -> None:
+        """Apply a level decided elsewhere (a simulation worker follows the renderer's budget)."""
+        if level != self.level:
+            self._setLevel(level)
+
+    def active(self, step: str) -> bool:
+        """Whether a degradation step is currently applied."""
+        return step in self._active
+
+    @property
+    def qualityName(self) -> str:
+        """Label for the HUD: 'full' or the most recent degradation step."""
+        return self.steps[self.level - 1] if self.level else "full"
@@ -0,0 +1,153 @@
+"""Live tuning: a settings/constants file and the pattern files, polled by mtime and applied without a restart."""
+
+import json
+import os
+import time
+
+import settings
+from bullet_system import coerceTunable
+from patterns import patternDir
+
+# Settings that take effect while running; the rest are read once at startup
+liveSettings = ("MAX_BULLETS", "RENDER_SCALE", "OVERLAY_RADIUS", "GRID_SPACING")
+
+
+class FileWatcher:
+    """
+    Polls modification times of some files and of the .json files in a
+    directory, at most once per `interval` seconds. `changed()` returns the
+    paths created or modified since the previous poll.
+    """
+    def __init__(self, paths=(), directory: str = None, interval: float = settings.TUNING_POLL_SECONDS):
+        self.paths = list(paths)
+        self.directory = directory
+        self.interval = interval
+        self._mtimes = self._scan()
+        self._nextPoll = time.monotonic() + interval
+
+    def _scan(self) -> dict:
+        paths = list(self.paths)
+        if self.directory is not None and os.path.isdir(self.directory):
+            paths += [entry.path for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    def changed(self) -> list:
+        now = time.monotonic()
+        if now < self._nextPoll:
+            return []
+        self._nextPoll = now + self.interval
+        mtimes = self._scan()
+        changed = [path for path, mtime in mtimes.items() if self._mtimes.get(path) != mtime]
+        self._mtimes = mtimes
+        return changed
+
+
+def loadJson(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    return data
+
+
+def tuningSections(config: dict) -> dict:
+    """The sections of a tuning file; raises ValueError when one is not shaped as documented."""
+    sections = {name: config.get(name, {}) for name in ("settings", "constants", "emitters")}
+    for name, section in sections.items():
+        if not isinstance(section, dict):
+            raise ValueError(f'"{name}" must be an object')
+    for name, values in sections["emitters"].items():
+        if not isinstance(values, dict):
+            raise ValueError(f'emitter "{name}" must be an object of parameters')
+    return sections
+
+
+def applySettings(values: dict) -> list:
+    """
+    Set live settings; returns the names changed. Raises ValueError,
+    changing nothing, on a setting that is not live or a bad value.
+    """
+    notLive = [name for name in values if name not in liveSettings]
+    if notLive:
+        raise ValueError(f"not live (edit settings.py and restart): {', '.join(notLive)}")
+    values = {name: coerceTunable(name, value, getattr(settings, name)) for name, value in values.items()}
+    changed = []
+    for name, value in values.items():
+        if getattr(settings, name) != value:
+            setattr(settings, name, value)
+            changed.append(name)
+    return changed
+
+
+class HotReloader:
+    """
+    Watches the tuning file and the pattern directory. The tuning file is
+    a JSON object with optional sections:
+
+        "settings":  live settings (see liveSettings)
+        "constants": bullet_system tunables (straightSpeed, sineAmplitude, ...)
+        "emitters":  {emitter name: {parameter: value}} for running emitters
+
+    The whole file is reapplied on every change. Settings are applied here
+    (render scale, background layer); constants, emitter parameters and
+    edited patterns go to the simulation, in its worker when there is one.
+    A file that fails to parse is reported and leaves everything as it was;
+    a bad value is reported and leaves its section (settings, constants or
+    one emitter) as it was.
+    """
+    def __init__(self, simulation, viewport=None, log=print, path: str = settings.TUNING_PATH,
+                 directory: str = patternDir):
+        self.simulation = simulation
+        self.viewport = viewport
+        self.log = log
+        self.path = path
+        self.watcher = FileWatcher([path], directory)
+        if os.path.exists(path):
+            self.reload(path)
+
+    def poll(self) -> None:
+        """Apply whatever changed since the last poll; called once per frame."""
+        for path in self.watcher.changed():
+            self.reload(path)
+        for notice in self.simulation.notices():
+            self.log(notice)
+
+    def reload(self, path: str) -> None:
+        name = os.path.basename(path)
+        try:
+            data = loadJson(path)
+        except (OSError, ValueError) as e:
+            self.log(f"Reload of {name} failed: {e}")
+            return
+        if path == self.path:
+            self.applyTuning(data)
+        else:
+            self.simulation.reloadPattern(data)
+        self.log(f"Reloaded {name}")
+
+    def applyTuning(self, config: dict) -> None:
+        try:
+            sections = tuningSections(config)
+        except ValueError as e:
+            self.log(f"Tuning: {e}")
+            return
+        changed = []
+        try:
+            changed = applySettings(sections["settings"])
+        except (TypeError, ValueError) as e:
+            self.log(f"Tuning settings: {e}")
+            # The simulation must not pick up the part that was rejected here
+            sections["settings"] = {}
+        viewport = self.viewport
+        if viewport is not None:
+            if "RENDER_SCALE" in changed:
+                viewport.setScale(settings.RENDER_SCALE)
+            elif "OVERLAY_RADIUS" in changed or "GRID_SPACING" in changed:
+                viewport.invalidate("background")
+        self.simulation.retune(sections)
@@ -19,18 +19,78 @@ class HUDRenderer:
         if len(self.debugLogs) > self.maxLines:
             self.debugLogs.pop(0)
 
-    def draw(self, surface: pygame.Surface, fps: float, bulletCount: int) -> None:
-        """Draw FPS and bullet count."""
+    def draw(self, surface: pygame.Surface, fps: float, bulletCount: int, quality: str = None,
+             score: int = None, hits: int = None) -> None:
+        """Draw FPS, bullet count, the current quality level, score and hits taken."""
         fpsText = self.font.render(f"FPS: {fps:.1f}", True, self.color)
         bulletText = self.font.render(f"Bullets: {bulletCount}", True, self.color)
 
         surface.blit(fpsText, (self.x, self.y))
         surface.blit(bulletText, (self.x, self.y + 20))
+        if score is not None:
+            scoreText = self.font.render(f"Score: {score}", True, self.color)
+            surface.blit(scoreText, (self.x + 150, self.y + 20))
+        if hits is not None:
+            hitText = self.font.render(f"Hits: {hits}", True, self.color)
+            surface.blit(hitText, (self.x + 300, self.y + 20))
+        if quality is not None:
+            qualityText = self.font.render(f"Quality: {quality}", True, self.color)
+            surface.blit(qualityText, (self.x + 150, self.y))
 
         self.drawDebug(surface)
 
+    def drawBoss(self, surface: pygame.Surface, name: str, phaseName: str, hpFraction: float) -> None:
+        """Draw the boss name, current phase and a health bar along the top."""
+        width = surface.get_width() // 2
+        left = (surface.get_width() - width) // 2
+        pygame.draw.rect(surface, self.color, (left, self.y, width, 10), 1)
+        pygame.draw.rect(surface, (220, 60, 90), (left + 1, self.y + 1, int((width - 2) * hpFraction), 8))
+        label = self.font.render(f"{name} - {phaseName}", True, self.color)
+        surface.blit(label, (left, self.y + 14))
+
     def drawDebug(self, surface: pygame.Surface) -> None:
         """Draw debug messages."""
         for i, msg in enumerate(self.debugLogs):
             debugText = self.font.render(msg, True, self.color)
             surface.blit(debugText, (self.x, self.y + 50 + i * 20))
+
+    def drawProfiler(self, surface: pygame.Surface, profiler, emitterCounts: dict = None,
+                     width: int = 320) -> None:
+        """Draw section timings, the frame-time graph, percentiles and per-emitter bullet counts."""
+        left = surface.get_width() - width - self.x
+        top = self.y
+        summary = (f"p50 {profiler.percentile(50):.1f}  p95 {profiler.percentile(95):.1f}  "
+                   f"p99 {profiler.percentile(99):.1f} ms  hitches {profiler.hitches}")
+        sections = list(profiler.sectionMs.items())
+        counts = sorted((name, n) for name, n in (emitterCounts or {}).items() if n > 0)
+        graphHeight = 60
+        height = 20 * (1 + len(sections) + len(counts)) + graphHeight + 20
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        surface.blit(panel, (left, top))
+
+        surface.blit(self.font.render(summary, True, self.color), (left + 6, top + 2))
+        y = top + 22
+        scale = (width - 130) / profiler.budgetMs
+        for name, ms in sections:
+            surface.blit(self.font.render(f"{name} {ms:.2f}", True, self.color), (left + 6, y))
+            barColor = (220, 60, 90) if ms > profiler.budgetMs / 2 else (90, 200, 120)
+            pygame.draw.rect(surface, barColor, (left + 124, y + 5, min(width - 130, int(ms * scale)), 8))
+            y += 20
+
+        # Frame times, newest on the right, with the budget as a reference line
+        frames = profiler.history()
+        graphTop = y + 4
+        ceiling = max(profiler.budgetMs * 2, float(frames.max()) if len(frames) else 0.0)
+        budgetY = graphTop + graphHeight - profiler.budgetMs / ceiling * graphHeight
+        pygame.draw.line(surface, (120, 120, 120), (left + 6, budgetY), (left + width - 6, budgetY))
+        if len(frames) > 1:
+            step = (width - 12) / (len(frames) - 1)
+            points = [(left + 6 + i * step, graphTop + graphHeight - ms / ceiling * graphHeight)
+                      for i, ms in enumerate(frames.tolist())]
+            pygame.draw.lines(surface, self.color, False, points)
+        y = graphTop + graphHeight + 8
+
+        for name, count in counts:
+            surface.blit(self.font.render(f"{name}: {count}", True, self.color), (left + 6, y))
+            y += 20
@@ -0,0 +1,101 @@
+"""Laser beams: rotating segments drawn as polygons and collided analytically."""
+
+import math
+import pygame
+
+laserColor = (255, 60, 120)
+laserCoreColor = (255, 230, 240)
+warningColor = (255, 60, 120)
+
+
+def pointSegmentDistance(px, py, ax, ay, bx, by):
+    """Distance from a point to the segment a-b."""
+    dx, dy = bx - ax, by - ay
+    lengthSq = dx * dx + dy * dy
+    t = 0.0 if lengthSq == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / lengthSq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def beamQuad(ax, ay, bx, by, width):
+    """Corners of a beam of the given width around the segment a-b."""
+    dx, dy = bx - ax, by - ay
+    length = math.hypot(dx, dy) or 1.0
+    nx, ny = -dy / length * width / 2, dx / length * width / 2
+    return ((ax + nx, ay + ny), (bx + nx, by + ny), (bx - nx, by - ny), (ax - nx, ay - ny))
+
+
+def drawBeam(surface, ax, ay, bx, by, width, phase, color=laserColor, cheap=False, scale=1.0):
+    """Draw a beam in the given phase; shared by lasers and remote views of them."""
+    if phase == "done":
+        return
+    if scale != 1.0:
+        ax, ay, bx, by, width = ax * scale, ay * scale, bx * scale, by * scale, width * scale
+    if cheap:
+        lineWidth = 1 if phase == "warmup" else max(1, int(width / 2))
+        pygame.draw.line(surface, color, (ax, ay), (bx, by), lineWidth)
+    elif phase == "warmup":
+        pygame.draw.line(surface, warningColor, (ax, ay), (bx, by), 1)
+    else:
+        pygame.draw.polygon(surface, color, beamQuad(ax, ay, bx, by, width))
+        pygame.draw.polygon(surface, laserCoreColor, beamQuad(ax, ay, bx, by, width * 0.4))
+
+
+class Laser:
+    """
+    A beam segment anchored on a transform node.
+    It telegraphs as a thin line for `warmup` frames, then damages for
+    `active` frames (None = until reset). The whole beam is two endpoints,
+    so updating, drawing and collision cost the same at any length.
+    """
+    def __init__(self, length, width=16, angle=0.0, spin=0.0, warmup=45, active=None,
+                 twoSided=True, origin=None, color=laserColor):
+        self.length = length
+        self.width = width
+        self.angle = angle
+        self.spin = spin
+        self.warmup = warmup
+        self.active = active
+        self.twoSided = twoSided
+        self.origin = origin
+        self.color = color
+        self.frame = 0
+        self.ax = self.ay = self.bx = self.by = 0.0
+        self._place()
+
+    @property
+    def phase(self):
+        if self.frame < self.warmup:
+            return "warmup"
+        if self.active is None or self.frame < self.warmup + self.active:
+            return "active"
+        return "done"
+
+    def reset(self):
+        """Restart the warm-up telegraph."""
+        self.frame = 0
+
+    def _place(self):
+        origin = self.origin
+        ox, oy, rot = (0.0, 0.0, 0.0) if origin is None else (origin.worldX, origin.worldY, origin.worldRotation)
+        a = self.angle + rot
+        dx, dy = math.cos(a) * self.length, math.sin(a) * self.length
+        self.bx, self.by = ox + dx, oy + dy
+        self.ax, self.ay = (ox - dx, oy - dy) if self.twoSided else (ox, oy)
+
+    def update(self):
+        self.frame += 1
+        self.angle += self.spin
+        self._place()
+
+    def hits(self, x, y, radius=0.0):
+        """True if a circle touches the beam while it is active."""
+        if self.phase != "active":
+            return False
+        return pointSegmentDistance(x, y, self.ax, self.ay, self.bx, self.by) <= self.width / 2 + radius
+
+    def draw(self, surface, scale=1.0):
+        drawBeam(surface, self.ax, self.ay, self.bx, self.by, self.width, self.phase, self.color, scale=scale)
+
+    def drawCheap(self, surface, scale=1.0):
+        """Single line instead of polygons (degraded quality)."""
+        drawBeam(surface, self.ax, self.ay, self.bx, self.by, self.width, self.phase, self.color, True, scale)
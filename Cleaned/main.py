@@ -7,103 +7,212 @@ from typing import Tuple, List
 
 from cube import CubeRenderer
 from hud import HUDRenderer
-from beat_pulse import BeatPulseController
+from beat_pulse import BeatPulseController, AUDIO_FRAME
+from event_bus import EventBus
+from sfx import SfxManager
 from player import Player
-from bullet_system import *
-from emitter_manager import EmitterManager, initEmitters
+from fonts import loadFont
+from profiler import Profiler, StartupTimer
+from telemetry import TelemetryRecorder
+from simulation import LocalSimulation, RemoteSimulation
+from viewport import Viewport
+from hot_reload import HotReloader
+
+
+# Profiler sections of the main loop, in order
+stageNames = ("background", "cube", "events", "player", "simulation", "bullet draw", "audio", "present", "hud",
+              "flip")
 
 
 def main():
     """Main game loop."""
-    # Initialize pygame
-    pygame.init()
-    info = pygame.display.Info()
-    settings.WIDTH = info.current_w
-    settings.HEIGHT = info.current_h
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    startup = StartupTimer()
+    # Initialize only the pygame modules in use; the mixer starts with the audio
+    with startup.phase("display"):
+        pygame.display.init()
+        pygame.font.init()
+        # The playfield stays settings.WIDTH x HEIGHT whatever the display resolution
+        viewport = Viewport()
     clock = pygame.time.Clock()
-    
+
     # UI
-    font = pygame.font.SysFont("Arial", 18)
+    with startup.phase("font"):
+        font = loadFont("Arial", 18)
     center = (settings.WIDTH // 2, settings.HEIGHT // 2)
     
     # Circle overlay
-    radius = 400
     color = (128, 128, 128)
     thickness = 2
+    bombRadius = 300
+
+    def drawBackground(surface, scale):
+        """Circle overlay and grid; they never move, so they are drawn once into a cached layer."""
+        pygame.draw.circle(surface, color, (center[0] * scale, center[1] * scale), settings.OVERLAY_RADIUS * scale,
+                           max(1, round(thickness * scale)))
+        gridColor = (40, 40, 40)
+        spacing = settings.GRID_SPACING
+        for x in range(0, settings.WIDTH, spacing):
+            pygame.draw.line(surface, gridColor, (x * scale, 0), (x * scale, settings.HEIGHT * scale))
+        for y in range(0, settings.HEIGHT, spacing):
+            pygame.draw.line(surface, gridColor, (0, y * scale), (settings.WIDTH * scale, y * scale))
     
     # Initialize game systems
-    manager = EmitterManager()
-    initEmitters(manager)
+    bus = EventBus()
     cubeRenderer = CubeRenderer(center=center)
     hudRenderer = HUDRenderer(font=font)
-    beatPulse = BeatPulseController("assets/audio/test1_125bpm.wav")
-    playerCharacter = Player(100, 100)
+    profiler = Profiler()
+    showProfiler = False
+    with startup.phase("audio"):
+        beatPulse = BeatPulseController("assets/audio/test1_125bpm.wav", bus=bus)
+        bus.subscribe(AUDIO_FRAME, cubeRenderer.onAudioFrame)
+        beatGrid = beatPulse.beatGrid
+    with startup.phase("sfx"):
+        sfx = SfxManager()
+        sfx.loadAll()
+    playerCharacter = Player(100, 100, sfx=sfx)
+    enemyShotSound = sfx.soundId("enemyShot")
+    enemySpawned = 0
+    # Bullets, emitters and the boss run here or in a worker process
+    with startup.phase("simulation"):
+        simulationType = RemoteSimulation if settings.MULTIPROCESS_SIM else LocalSimulation
+        simulation = simulationType(beatGrid, beatPulse.duration)
+        simulation.attachPlayer(playerCharacter, bus)
+    # Telemetry needs the section timers, so it keeps the profiler running
+    telemetry = None
+    if settings.TELEMETRY_PATH:
+        telemetry = TelemetryRecorder(settings.TELEMETRY_PATH, stageNames, simulation.emitterNames())
+        profiler.setEnabled(True)
+
+    # Tuning and pattern files edited while running are applied live; results go to the HUD log
+    reloader = HotReloader(simulation, viewport, hudRenderer.log) if settings.TUNING_PATH else None
+    tick = 0
 
     running = True
     while running:
         clock.tick(settings.FPS_TARGET)
-        screen.fill((0, 0, 0))
-
-        # Draw circle overlay
-        pygame.draw.circle(screen, color, center, radius, thickness)
+        if reloader is not None:
+            reloader.poll()
+        # Gameplay draws into the internal surface in playfield units times `scale`
+        screen, scale, window = viewport.surface, viewport.scale, viewport.window
+
+        # Apply the current degradation level
+        budget = simulation.budget
+        cosmetics = not budget.active("skipCosmetics")
+        lowRes = budget.active("lowEffectRes")
+        playerCharacter.drawRings = cosmetics
+        playerCharacter.ringSegments = 12 if lowRes else 32
+        cubeRenderer.antialias = not lowRes
+
+        # Draw circle overlay and grid
+        with profiler.section("background"):
+            if cosmetics:
+                screen.blit(viewport.layer("background", drawBackground), (0, 0))
+            else:
+                screen.fill((0, 0, 0))
 
         # Update and draw cube
-        dt = clock.get_time() / 1000.0
-        cubeRenderer.update(dt)
-        cubeRenderer.draw(screen)
-
-        # Draw grid
-        gridColor = (40, 40, 40)
-        spacing = 100
-        for x in range(0, settings.WIDTH, spacing):
-            pygame.draw.line(screen, gridColor, (x, 0), (x, settings.HEIGHT))
-        for y in range(0, settings.HEIGHT, spacing):
-            pygame.draw.line(screen, gridColor, (0, y), (settings.WIDTH, y))
+        with profiler.section("cube"):
+            dt = clock.get_time() / 1000.0
+            cubeRenderer.update(dt)
+            cubeRenderer.draw(screen, scale)
 
         # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+        with profiler.section("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
                     running = False
-                # Toggle patterns
-                elif event.key == pygame.K_1:
-                    manager.toggle("straight")
-                elif event.key == pygame.K_2:
-                    manager.toggle("orbiting")
-                elif event.key == pygame.K_3:
-                    manager.toggle("sine")
-                elif event.key == pygame.K_4:
-                    manager.toggle("line")
-                elif event.key == pygame.K_5:
-                    manager.toggle("curve")
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    # Toggle patterns
+                    elif event.key == pygame.K_1:
+                        simulation.toggle("straight")
+                    elif event.key == pygame.K_2:
+                        simulation.toggle("orbiting")
+                    elif event.key == pygame.K_3:
+                        simulation.toggle("sine")
+                    elif event.key == pygame.K_4:
+                        simulation.toggle("line")
+                    elif event.key == pygame.K_5:
+                        simulation.toggle("curve")
+                    elif event.key == pygame.K_6:
+                        simulation.toggle("flower")
+                    elif event.key == pygame.K_7:
+                        simulation.toggle("spiral")
+                    elif event.key == pygame.K_8:
+                        simulation.toggle("fan")
+                    elif event.key == pygame.K_9:
+                        simulation.toggle("homing")
+                    elif event.key == pygame.K_F3:
+                        showProfiler = not showProfiler
+                        profiler.setEnabled(showProfiler or telemetry is not None)
+                    elif event.key == pygame.K_b:
+                        simulation.startBoss()
+                    elif event.key == pygame.K_x:
+                        # Bomb: clear everything around the player into score items
+                        simulation.cancelCircle(playerCharacter.x, playerCharacter.y, bombRadius, convert="items")
 
         # Update player
-        keys = pygame.key.get_pressed()
-        playerCharacter.handleInput(keys)
-        playerCharacter.update(keys)
-        playerCharacter.draw(screen)
-
-        # Update and draw bullets
-        manager.update()
-        manager.draw(screen)
-        
-        # Update audio-reactive effects
-        amplitude = beatPulse.update(dt)
-        cubeRenderer.baseSize = 10 * amplitude + 5
+        with profiler.section("player"):
+            keys = pygame.key.get_pressed()
+            playerCharacter.handleInput(keys)
+            playerCharacter.update(keys)
+            playerCharacter.draw(screen, scale)
+
+            # Sword parry cancels bullets in the blade's sector
+            if playerCharacter.swinging:
+                simulation.cancelSector(playerCharacter.x, playerCharacter.y, 180,
+                                        math.radians(playerCharacter.swordAngle), math.radians(40), convert="particles")
+
+        # Advance the boss timeline, then update and draw bullets
+        songTime = beatPulse.playbackSeconds()
+        with profiler.section("simulation"):
+            simulation.update(songTime)
+            # One enemy-shot cue per tick that fired, however many bullets it spawned
+            spawned = simulation.spawnedCount()
+            if spawned > enemySpawned:
+                sfx.play(enemyShotSound)
+            enemySpawned = spawned
+        with profiler.section("bullet draw"):
+            simulation.draw(screen, scale)
+
+        # Update audio-reactive effects (publishes band events on the bus)
+        with profiler.section("audio"):
+            beatPulse.update(dt)
+
+        # Upscale to the window; a software-scaled window gets the HUD at native resolution
+        with profiler.section("present"):
+            viewport.present()
 
         # Draw HUD
-        bulletCount = sum(
-            len(manager.emitters[name].bullets)
-            for name, active in manager.active.items()
-            if active
-        )
-        hudRenderer.draw(screen, clock.get_fps(), bulletCount)
-
-        pygame.display.flip()
-
+        with profiler.section("hud"):
+            hudRenderer.draw(window, clock.get_fps(), simulation.bulletCount(), budget.qualityName,
+                             playerCharacter.score, playerCharacter.hits)
+            bossStatus = simulation.bossStatus()
+            if bossStatus is not None:
+                hudRenderer.drawBoss(window, *bossStatus)
+            if showProfiler:
+                hudRenderer.drawProfiler(window, profiler, simulation.emitterCounts())
+
+        with profiler.section("flip"):
+            sfx.endFrame()
+            pygame.display.flip()
+        budget.record(clock.get_rawtime())
+        if startup is not None:
+            # Time to first frame, shown once
+            report = startup.report()
+            print(report)
+            hudRenderer.log(report)
+            startup = None
+        profiler.endFrame()
+        if telemetry is not None:
+            telemetry.record(tick, profiler.lastFrameMs, profiler.lastFrame, simulation.emitterCounts(),
+                             simulation.activeEmitters(), beatPulse.lastAmplitude)
+        tick += 1
+
+    if telemetry is not None:
+        telemetry.close()
+    simulation.close()
     pygame.quit()
 
 
@@ -0,0 +1,177 @@
+"""Declarative bullet patterns compiled into vectorized spawn bursts."""
+
+import json
+import math
+import os
+
+import numpy as np
+
+import bullet_system
+from bullet_system import Emitter
+
+patternDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patterns")
+
+
+def _ramp(value, count):
+    """A scalar, or a [start, end] pair spread linearly over the layer."""
+    if isinstance(value, (list, tuple)):
+        return np.linspace(value[0], value[1], count)
+    return np.full(count, float(value))
+
+
+def _compileLayer(layer):
+    """Compile one layer (and its children) into direction/speed/offset/aimed/turn arrays."""
+    kind = layer["type"]
+    base = math.radians(layer.get("angle", 0.0))
+
+    if kind == "ring":
+        count = layer["count"]
+        angles = base + 2 * np.pi * np.arange(count) / count
+    elif kind in ("arc", "fan"):
+        count = layer["count"]
+        spread = math.radians(layer.get("spread", 60.0))
+        angles = base + (np.linspace(-spread / 2, spread / 2, count) if count > 1 else np.zeros(1))
+    elif kind == "spiral":
+        arms = layer.get("arms", 1)
+        perArm = layer["count"]
+        twist = math.radians(layer.get("twist", 10.0))
+        arm = np.repeat(np.arange(arms), perArm)
+        step = np.tile(np.arange(perArm), arms)
+        angles = base + 2 * np.pi * arm / arms + step * twist
+        count = arms * perArm
+    else:
+        raise ValueError(f"Unknown pattern layer type: {kind}")
+
+    angles = angles + np.radians(_ramp(layer.get("angleRamp", 0.0), count))
+    speeds = _ramp(layer.get("speed", bullet_system.straightSpeed), count)
+    dirs = np.exp(1j * angles)
+    offsets = dirs * layer.get("radius", 0.0)
+    aimed = np.full(count, kind == "fan" or layer.get("aim", False))
+    turn = np.full(count, math.radians(layer.get("homing", 0.0)))
+
+    children = layer.get("children")
+    if not children:
+        return dirs, speeds, offsets, aimed, turn
+
+    # Each parent bullet becomes the origin of every child layer, rotated by its direction
+    parts = [_compileLayer(child) for child in children]
+    cDirs = np.concatenate([p[0] for p in parts])
+    cSpeeds = np.concatenate([p[1] for p in parts])
+    cOffsets = np.concatenate([p[2] for p in parts])
+    cAimed = np.concatenate([p[3] for p in parts])
+    cTurn = np.concatenate([p[4] for p in parts])
+    relative = layer.get("relative", True)
+    rot = dirs[:, None] if relative else np.ones((count, 1))
+    return (
+        (cDirs[None, :] * rot).ravel(),
+        np.broadcast_to(cSpeeds, (count, len(cSpeeds))).ravel(),
+        (offsets[:, None] + cOffsets[None, :] * rot).ravel(),
+        (aimed[:, None] | cAimed[None, :]).ravel(),
+        np.broadcast_to(cTurn, (count, len(cTurn))).ravel(),
+    )
+
+
+class CompiledPattern:
+    """
+    A pattern precompiled into unit directions, speeds and spawn offsets.
+    Spawning rotates the whole table by one complex multiply.
+    """
+    def __init__(self, spec: dict):
+        # Kept so the pattern can be recompiled when the defaults it fell back on change
+        self.spec = spec
+        self.name = spec.get("name", "pattern")
+        self.interval = spec.get("interval", bullet_system.emissionInterval)
+        self.spin = math.radians(spec.get("spin", 0.0))
+        self.color = tuple(spec.get("color", bullet_system.bulletColor))
+        self.radius = spec.get("bulletRadius", bullet_system.bulletRadius)
+        self.schedule = spec.get("schedule")
+        self.cosmetic = spec.get("cosmetic", False)
+        self.quota = spec.get("quota")
+        self.homingFrames = spec.get("homingFrames", 90)
+
+        parts = [_compileLayer(layer) for layer in spec["layers"]]
+        self.dirs = np.concatenate([p[0] for p in parts])
+        self.speeds = np.concatenate([p[1] for p in parts]).astype(np.float32)
+        self.offsets = np.concatenate([p[2] for p in parts])
+        self.aimed = np.concatenate([p[3] for p in parts])
+        self.turn = np.concatenate([p[4] for p in parts]).astype(np.float32)
+        self.anyHoming = bool(self.turn.any())
+        self.anyAimed = bool(self.aimed.any())
+        self.size = len(self.dirs)
+
+    def burst(self, origin, rotation: float, aimAngle: float = 0.0):
+        """Return (x, y, vx, vy) arrays for one burst."""
+        rot = complex(math.cos(rotation), math.sin(rotation))
+        if self.anyAimed:
+            aim = complex(math.cos(aimAngle), math.sin(aimAngle))
+            rot = np.where(self.aimed, aim, rot)
+        dirs = self.dirs * rot
+        pos = complex(*origin) + self.offsets * rot
+        return pos.real, pos.imag, dirs.real * self.speeds, dirs.imag * self.speeds
+
+
+def loadPattern(path: str) -> CompiledPattern:
+    """Load and compile one pattern file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return CompiledPattern(json.load(f))
+
+
+def loadPatterns(directory: str = patternDir) -> dict:
+    """Load and compile every pattern file in a directory, keyed by name."""
+    patterns = {}
+    for fileName in sorted(os.listdir(directory)):
+        if fileName.endswith(".json"):
+            pattern = loadPattern(os.path.join(directory, fileName))
+            patterns[pattern.name] = pattern
+    return patterns
+
+
+class PatternEmitter(Emitter):
+    """Spawns a compiled pattern into the shared bullet table."""
+    def __init__(self, pattern: CompiledPattern):
+        super().__init__()
+        self.pattern = pattern
+        self.interval = pattern.interval
+        self.rotation = 0.0
+
+    def setPattern(self, pattern: CompiledPattern):
+        """Swap in a recompiled pattern; bullets already in flight are left as they are."""
+        self.pattern = pattern
+        self.interval = pattern.interval
+        self.quota = pattern.quota
+        self._style = None
+        if self.store is not None:
+            self.store.setQuota(self.ownerId, pattern.quota)
+            self.prewarm()
+
+    def retune(self, changed):
+        # Layers without their own speed, interval or look compiled in the module defaults
+        if set(changed) & {"straightSpeed", "emissionInterval", "bulletColor", "bulletRadius"}:
+            self.setPattern(CompiledPattern(self.pattern.spec))
+
+    def styleId(self):
+        if self._style is None:
+            self._style = self.store.registerStyle(self.pattern.color, self.pattern.radius)
+        return self._style
+
+    def prewarm(self):
+        self.styleId()
+        # Touch the burst path once so NumPy's buffers are allocated ahead of time
+        self.pattern.burst((self.origin.worldX, self.origin.worldY), self.rotation)
+
+    def spawn(self):
+        store = self.store
+        style = self.styleId()
+        origin = self.origin
+        pos = (origin.worldX, origin.worldY)
+        aimAngle = 0.0
+        if self.target is not None:
+            # Aimed layers snapshot the target position at spawn time
+            aimAngle = math.atan2(self.target.y - pos[1], self.target.x - pos[0])
+        x, y, vx, vy = self.pattern.burst(pos, self.rotation + origin.worldRotation, aimAngle)
+        self.rotation += self.pattern.spin
+        pattern = self.pattern
+        if pattern.anyHoming:
+            return store.spawn(x, y, vx, vy, self.ownerId, style, pattern.cosmetic,
+                               pattern.turn, pattern.homingFrames)
+        return store.spawn(x, y, vx, vy, self.ownerId, style, pattern.cosmetic)
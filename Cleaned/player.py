@@ -3,24 +3,44 @@
 import settings
 import pygame
 import math
+import numpy as np
 
-center = (settings.WIDTH // 2, settings.HEIGHT // 2)
+from bullet_store import BulletStore
 
+invulnerableFrames = 60
+shotSpeed = 10
+shotRadius = 5
+# Oldest shots are recycled past this, so firing never stalls
+shotCapacity = 256
 
 class Player:
     """Player character with beam and sword attacks."""
-    def __init__(self, x, y, radius=20, speed=5):
+    def __init__(self, x, y, radius=20, speed=5, sfx=None):
         self.x = x
         self.y = y
         self.radius = radius
         self.speed = speed
         self.color = (0, 255, 0)
         self.bulletColor = (255, 255, 0)
-        self.bullets = []
+        # Moved, culled and drawn by the world once added as its "shots" table
+        self.shots = BulletStore(shotCapacity, maxBullets=shotCapacity, bounds=(settings.WIDTH, settings.HEIGHT, 0))
+        self.shotStyle = self.shots.registerStyle(self.bulletColor, shotRadius)
         self.bulletCooldown = 10
         self.cooldownTimer = 0
         self.swordAngle = 0
         self.swinging = False
+        self.sfx = sfx
+        self.score = 0
+        self.hits = 0
+        self.invulnerable = 0
+        # Where shots and the beam point; main moves it onto the boss
+        self.aimPoint = (settings.WIDTH // 2, settings.HEIGHT // 2)
+        self.ringSegments = 32
+        self.drawRings = True
+        if sfx is not None:
+            self.shotSound = sfx.soundId("shot")
+            self.swordSound = sfx.soundId("sword")
+            self.hitSound = sfx.soundId("hit")
 
     def handleInput(self, keys):
         """Handle keyboard input for movement."""
@@ -37,29 +57,36 @@ class Player:
             self.x += dx * self.speed
             self.y += dy * self.speed
 
+    def hit(self):
+        """Take a hit, then ignore further hits for a short while."""
+        if self.invulnerable == 0:
+            self.hits += 1
+            self.invulnerable = invulnerableFrames
+            if self.sfx is not None:
+                self.sfx.play(self.hitSound)
+
     def update(self, keys):
         """Update player state (shooting, sword swing)."""
+        if self.invulnerable > 0:
+            self.invulnerable -= 1
         if self.cooldownTimer > 0:
             self.cooldownTimer -= 1
         if keys[pygame.K_SPACE] and self.cooldownTimer == 0:
-            self.shoot(center)
+            self.shoot(self.aimPoint)
             self.cooldownTimer = self.bulletCooldown
         if keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL]:
             if not self.swinging:
                 self.swinging = True
                 self.swordAngle = 0
+                if self.sfx is not None:
+                    self.sfx.play(self.swordSound)
 
         if self.swinging:
             self.swordAngle += 6
         if self.swordAngle >= 360:
             self.swordAngle = 0
             self.swinging = False
-        
-        # Update bullets
-        for bullet in self.bullets:
-            bullet['x'] += bullet['dx'] * bullet['speed']
-            bullet['y'] += bullet['dy'] * bullet['speed']
-        self.bullets = [b for b in self.bullets if 0 <= b['x'] <= settings.WIDTH and 0 <= b['y'] <= settings.HEIGHT]
+
 
     def shoot(self, targetPos):
         """Shoot a bullet towards target."""
@@ -72,26 +99,23 @@ class Player:
         dy /= length
         spawnX = self.x + dx * (self.radius + 1)
         spawnY = self.y + dy * (self.radius + 1)
-        bullet = {
-            'x': spawnX,
-            'y': spawnY,
-            'dx': dx,
-            'dy': dy,
-            'speed': 10,
-            'radius': 5
-        }
-        self.bullets.append(bullet)
-
-    def draw(self, screen):
-        """Draw player with rings and sword."""
-        time = pygame.time.get_ticks() * 0.002
-        cx, cy = self.x, self.y
-        ringRadius = 40
-        ringThickness = 2
-        segments = 32
+        self.shots.spawn(spawnX, spawnY, np.array([dx * shotSpeed]), np.array([dy * shotSpeed]), style=self.shotStyle)
+        if self.sfx is not None:
+            self.sfx.play(self.shotSound)
 
-        # Draw three rotating rings
-        for ring_type in range(3):
+    def draw(self, screen, scale=1.0):
+        """Draw player with rings and sword, positions and sizes times `scale`."""
+        time = pygame.time.get_ticks() * 0.002
+        cx, cy = self.x * scale, self.y * scale
+        ringRadius = 40 * scale
+        lineWidth = max(1, round(2 * scale))
+        ringThickness = lineWidth
+        segments = self.ringSegments
+
+        # Draw three rotating rings (a single marker when cosmetics are skipped)
+        if not self.drawRings:
+            pygame.draw.circle(screen, self.color, (int(cx), int(cy)), ringThickness * 3)
+        for ring_type in range(3 if self.drawRings else 0):
             for i in range(segments):
                 angle = time + i * (2 * math.pi / segments)
                 if ring_type == 0:  # Z-axis ring
@@ -105,17 +129,14 @@ class Player:
                     y = cy + math.sin(angle) * ringRadius
                 pygame.draw.circle(screen, self.color, (int(x), int(y)), ringThickness)
 
-        # Draw beam to center
-        pygame.draw.line(screen, (105, 7, 7), (cx, cy), center, 2)
-
-        # Draw bullets
-        for bullet in self.bullets:
-            pygame.draw.circle(screen, self.bulletColor, (int(bullet['x']), int(bullet['y'])), bullet['radius'])
+        # Draw beam to the aim point
+        aim = (self.aimPoint[0] * scale, self.aimPoint[1] * scale)
+        pygame.draw.line(screen, (105, 7, 7), (cx, cy), aim, lineWidth)
 
         # Draw sword if swinging
         if self.swinging:
             angleRad = math.radians(self.swordAngle)
-            length = 90
+            length = 90 * scale
             offset = math.radians(20)
 
             a1 = angleRad + offset
@@ -126,7 +147,7 @@ class Player:
             tipLength = length * 2
             tip = (cx + math.cos(angleRad) * tipLength, cy + math.sin(angleRad) * tipLength)
 
-            pygame.draw.line(screen, (255, 0, 0), (cx, cy), p1, 2)
-            pygame.draw.line(screen, (255, 0, 0), (cx, cy), p2, 2)
-            pygame.draw.line(screen, (255, 0, 0), p1, tip, 2)
-            pygame.draw.line(screen, (255, 0, 0), p2, tip, 2)
+            pygame.draw.line(screen, (255, 0, 0), (cx, cy), p1, lineWidth)
+            pygame.draw.line(screen, (255, 0, 0), (cx, cy), p2, lineWidth)
+            pygame.draw.line(screen, (255, 0, 0), p1, tip, lineWidth)
+            pygame.draw.line(screen, (255, 0, 0), p2, tip, lineWidth)
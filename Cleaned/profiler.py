@@ -0,0 +1,146 @@
+"""Scoped frame profiler: per-section timings, frame-time history, percentiles and hitches."""
+
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import settings
+
+historyFrames = 240
+# A frame this many times over budget counts as a hitch
+hitchFactor = 2.0
+
+
+class _NullSection:
+    """Shared do-nothing scope handed out while profiling is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_nullSection = _NullSection()
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """
+    Times named sections of each frame with `with profiler.section(name):`.
+    While disabled every section is the same no-op object and `endFrame`
+    returns at once, so instrumented code costs one attribute check per scope.
+    """
+    def __init__(self, budgetMs: float = 1000.0 / settings.FPS_TARGET, history: int = historyFrames,
+                 smoothing: float = 0.1):
+        self.enabled = False
+        self.budgetMs = budgetMs
+        self.smoothing = smoothing
+        # Rolling milliseconds per section, in first-seen order
+        self.sectionMs = {}
+        self._sections = {}
+        self._frame = {}
+        # Raw section times and duration of the last completed frame
+        self.lastFrame = {}
+        self.lastFrameMs = 0.0
+        self._history = np.zeros(history)
+        self._cursor = 0
+        self._filled = 0
+        self._last = None
+
+    def toggle(self) -> None:
+        """Switch profiling on or off; history restarts when switched on."""
+        self.setEnabled(not self.enabled)
+
+    def setEnabled(self, enabled: bool) -> None:
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        self.sectionMs.clear()
+        self._frame.clear()
+        self._cursor = self._filled = 0
+        self._last = None
+
+    def section(self, name: str):
+        if not self.enabled:
+            return _nullSection
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+        return section
+
+    def _add(self, name: str, seconds: float) -> None:
+        self._frame[name] = self._frame.get(name, 0.0) + seconds * 1000.0
+
+    def endFrame(self) -> None:
+        """Close the frame: fold its sections into the rolling averages and record its duration."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._last is not None:
+            self.lastFrameMs = (now - self._last) * 1000.0
+            self._history[self._cursor] = self.lastFrameMs
+            self._cursor = (self._cursor + 1) % len(self._history)
+            self._filled = min(self._filled + 1, len(self._history))
+        self._last = now
+        rolling = self.sectionMs
+        for name, ms in self._frame.items():
+            rolling[name] = rolling.get(name, ms) + (ms - rolling.get(name, ms)) * self.smoothing
+        self.lastFrame, self._frame = self._frame, self.lastFrame
+        self._frame.clear()
+
+    def history(self) -> np.ndarray:
+        """Recorded frame times in milliseconds, oldest first."""
+        if self._filled < len(self._history):
+            return self._history[:self._filled]
+        return np.roll(self._history, -self._cursor)
+
+    def percentile(self, q: float) -> float:
+        frames = self.history()
+        return float(np.percentile(frames, q)) if len(frames) else 0.0
+
+    @property
+    def hitches(self) -> int:
+        """Frames in the history that ran over `hitchFactor` times the budget."""
+        return int(np.count_nonzero(self.history() > self.budgetMs * hitchFactor))
+
+
+class StartupTimer:
+    """Wall-clock breakdown of startup phases, up to the first frame."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000.0))
+
+    def elapsedMs(self) -> float:
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def report(self) -> str:
+        """One line: time to now, then each phase."""
+        parts = ", ".join(f"{name} {ms:.0f}" for name, ms in self.phases)
+        return f"Startup {self.elapsedMs():.0f} ms ({parts})"
@@ -1,5 +1,45 @@
 """Global configuration settings for Bullet Hell Vibe Coding."""
 
+import os
+
 FPS_TARGET = 60
+# Logical playfield: patterns are simulated in these units on every display
 WIDTH = 1920
 HEIGHT = 1080
+
+# Internal render resolution as a fraction of the playfield, upscaled once to the window
+RENDER_SCALE = 1.0
+
+# Background circle overlay and grid, in playfield units
+OVERLAY_RADIUS = 400
+GRID_SPACING = 100
+
+# Live-bullet budget shared by every emitter; "oldest", "farthest" or "cosmetic" go first
+MAX_BULLETS = 3000
+EVICTION_POLICY = "oldest"
+
+# How far past the screen edge bullets travel before they are culled
+CULL_MARGIN = 16
+
+# Run the bullet simulation in a worker process, reading its results from shared memory
+MULTIPROCESS_SIM = False
+
+# Worker threads for per-table bullet kernels (0 = run them inline) and rows per chunk
+SIM_THREADS = 0
+SIM_CHUNK_SIZE = 4096
+
+# Per-frame telemetry log written during play (None = off)
+TELEMETRY_PATH = None
+
+# Memory for large cached images (boss art, backgrounds); small sprites live in atlases
+ASSET_BUDGET_MB = 64
+
+# Tuning file applied live when it changes, and how often it and the pattern files are checked
+TUNING_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tuning.json")
+TUNING_POLL_SECONDS = 0.5
+
+# Font lookups and audio analysis results are cached here between launches
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bullet-hell-vibe")
+
+# Applied in order while frames run over budget, undone in reverse
+DEGRADATION_STEPS = ("cheapBullets", "skipCosmetics", "throttleSpawns", "lowEffectRes")
@@ -0,0 +1,120 @@
+"""Sound-effect manager with preloaded sounds, channel groups and voice stealing."""
+
+import os
+import pygame
+from typing import Dict, Tuple
+
+# Channels reserved per category
+channelGroups = {"player": 4, "enemy": 8, "impact": 6, "ui": 2}
+
+# Effects preloaded at startup: name -> (path, category, volume)
+defaultSounds = {
+    "shot": ("assets/sfx/shot.wav", "player", 0.4),
+    "sword": ("assets/sfx/sword.wav", "player", 0.7),
+    "hit": ("assets/sfx/hit.wav", "impact", 0.8),
+    "enemyShot": ("assets/sfx/enemy_shot.wav", "enemy", 0.3),
+}
+
+
+class SfxManager:
+    """
+    Plays preloaded effects through reserved channel groups.
+    Sounds are addressed by integer id so play() is O(1) and allocation-free;
+    identical sounds are rate-limited per frame and full groups steal a voice.
+    """
+    def __init__(self, groups: Dict[str, int] = channelGroups, maxPerFrame: int = 1, stealPolicy: str = "oldest"):
+        if stealPolicy not in ("oldest", "quietest"):
+            raise ValueError(f"Unknown steal policy: {stealPolicy}")
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+
+        total = sum(groups.values())
+        # Channels below the reserved count are never picked by Sound.play()
+        pygame.mixer.set_num_channels(max(total + 8, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(total)
+
+        self.maxPerFrame = maxPerFrame
+        self.stealPolicy = stealPolicy
+        self.groupIndex = {}
+        self.groupChannels = []
+        self.groupVolumes = []
+        # Play serial of the sound started on each voice; the lowest busy one is the oldest
+        self.groupStarts = []
+        self._serial = 0
+        first = 0
+        for i, (name, count) in enumerate(groups.items()):
+            self.groupIndex[name] = i
+            self.groupChannels.append([pygame.mixer.Channel(c) for c in range(first, first + count)])
+            self.groupVolumes.append([0.0] * count)
+            self.groupStarts.append([0] * count)
+            first += count
+
+        # Per-sound tables, indexed by sound id
+        self.ids = {}
+        self.sounds = []
+        self.soundGroup = []
+        self.soundVolume = []
+        self._lastFrame = []
+        self._playsThisFrame = []
+        self.frame = 0
+
+    def load(self, name: str, path: str, category: str, volume: float = 1.0) -> int:
+        """Preload one effect and return its id (missing files play silently)."""
+        if name in self.ids:
+            return self.ids[name]
+        sound = pygame.mixer.Sound(path) if os.path.exists(path) else None
+        if sound is not None:
+            sound.set_volume(volume)
+        soundId = len(self.sounds)
+        self.ids[name] = soundId
+        self.sounds.append(sound)
+        self.soundGroup.append(self.groupIndex[category])
+        self.soundVolume.append(volume)
+        self._lastFrame.append(-1)
+        self._playsThisFrame.append(0)
+        return soundId
+
+    def loadAll(self, sounds: Dict[str, Tuple[str, str, float]] = defaultSounds) -> None:
+        """Preload a table of effects."""
+        for name, (path, category, volume) in sounds.items():
+            self.load(name, path, category, volume)
+
+    def soundId(self, name: str) -> int:
+        """Look up an effect id once, outside the hot path."""
+        return self.ids[name]
+
+    def endFrame(self) -> None:
+        """Advance the frame counter used for rate limiting."""
+        self.frame += 1
+
+    def _pickVoice(self, group: int) -> int:
+        """A free voice of the group, else the one the steal policy gives up."""
+        channels = self.groupChannels[group]
+        # Lower rank = stolen first
+        rank = self.groupStarts[group] if self.stealPolicy == "oldest" else self.groupVolumes[group]
+        victim = 0
+        for slot in range(len(channels)):
+            if not channels[slot].get_busy():
+                return slot
+            if rank[slot] < rank[victim]:
+                victim = slot
+        return victim
+
+    def play(self, soundId: int) -> None:
+        """Play an effect, rate-limited per frame, stealing a voice if needed."""
+        sound = self.sounds[soundId]
+        if sound is None:
+            return
+        if self._lastFrame[soundId] != self.frame:
+            self._lastFrame[soundId] = self.frame
+            self._playsThisFrame[soundId] = 0
+        if self._playsThisFrame[soundId] >= self.maxPerFrame:
+            return
+        self._playsThisFrame[soundId] += 1
+
+        group = self.soundGroup[soundId]
+        slot = self._pickVoice(group)
+        self._serial += 1
+        self.groupStarts[group][slot] = self._serial
+        self.groupVolumes[group][slot] = self.soundVolume[soundId]
+        self.groupChannels[group][slot].play(sound)
@@ -0,0 +1,425 @@
+"""Bullet simulation drivers: in-process, or in a worker process over double-buffered shared memory."""
+
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import settings
+from bullet_store import BulletStore
+from collision import ShotCollider
+from emitter_manager import EmitterManager, initEmitters
+from frame_budget import FrameBudget
+from hot_reload import applySettings
+from laser import drawBeam
+from timeline import loadTimeline
+
+# Shared frame layout: a float64 header, then per-bullet columns and a small laser table
+HEADER = ("frame", "count", "enemyCount", "enemySpawned", "score", "hits", "invulnerable",
+          "bossRunning", "bossHp", "bossX", "bossY", "lasers")
+LASER_FIELDS = ("ax", "ay", "bx", "by", "width", "phase", "r", "g", "b")
+LASER_PHASES = ("warmup", "active", "done")
+frameCapacity = 32768
+maxLasers = 32
+# Ticks between per-emitter bullet counts sent by the worker
+countsInterval = 15
+# Seconds to wait on the worker before treating it as dead
+workerTimeout = 5.0
+
+
+def frameBytes(capacity: int) -> int:
+    """Size of one buffer, padded to 8 bytes so the second buffer stays aligned."""
+    size = len(HEADER) * 8 + capacity * 4 * 2 + maxLasers * len(LASER_FIELDS) * 4 + capacity
+    return (size + 7) // 8 * 8
+
+
+class SharedFrame:
+    """NumPy views of one buffer in the shared block."""
+    def __init__(self, buf, index: int, capacity: int):
+        offset = index * frameBytes(capacity)
+        self.header = np.ndarray(len(HEADER), np.float64, buf, offset)
+        offset += self.header.nbytes
+        self.x = np.ndarray(capacity, np.float32, buf, offset)
+        offset += self.x.nbytes
+        self.y = np.ndarray(capacity, np.float32, buf, offset)
+        offset += self.y.nbytes
+        self.lasers = np.ndarray((maxLasers, len(LASER_FIELDS)), np.float32, buf, offset)
+        offset += self.lasers.nbytes
+        self.style = np.ndarray(capacity, np.uint8, buf, offset)
+
+    def read(self) -> dict:
+        return dict(zip(HEADER, self.header.tolist()))
+
+
+class LocalSimulation:
+    """Emitters, world and boss timeline, stepped in this process."""
+    def __init__(self, beatGrid, loopLength: float = 0.0, boss: str = "boss1"):
+        self.manager = EmitterManager()
+        initEmitters(self.manager)
+        self.manager.setBeatGrid(beatGrid)
+        self.timeline = loadTimeline(boss, self.manager, beatGrid.beatPeriod)
+        self.loopLength = loopLength
+        self.player = None
+        self._notices = []
+
+    @property
+    def budget(self) -> FrameBudget:
+        return self.manager.budget
+
+    def attachPlayer(self, player, bus=None) -> None:
+        """Aim at the player and move, collide and draw their shots in the world."""
+        self.player = player
+        self.manager.setTarget(player)
+        self.manager.world.addTable("shots", player.shots)
+        self.manager.world.addSystem(ShotCollider(bus))
+
+    def toggle(self, name: str) -> None:
+        self.manager.toggle(name)
+
+    def startBoss(self) -> None:
+        self.timeline.start()
+
+    def cancelCircle(self, cx, cy, radius, convert=None) -> None:
+        self.manager.cancelCircle(cx, cy, radius, convert)
+
+    def cancelSector(self, cx, cy, radius, angle, width, convert=None) -> None:
+        self.manager.cancelSector(cx, cy, radius, angle, width, convert)
+
+    def retune(self, config: dict) -> None:
+        """Apply a hot-reloaded tuning file (see hot_reload.HotReloader)."""
+        # Settings were checked and applied by the reloader; this copies them into a worker process
+        applySettings(config.get("settings", {}))
+        self._notices += self.manager.retune(config.get("constants"), config.get("emitters"))
+
+    def reloadPattern(self, spec: dict) -> None:
+        self._notices += self.manager.reloadPattern(spec)
+
+    def notices(self) -> list:
+        """Problems found applying tuning since the last call."""
+        notices, self._notices = self._notices, []
+        return notices
+
+    def update(self, songTime: float = None) -> None:
+        """Advance the boss timeline, then one simulation tick."""
+        timeline = self.timeline
+        timeline.update(songTime, self.loopLength)
+        if timeline.running and self.player is not None:
+            self.player.aimPoint = (timeline.boss.x, timeline.boss.y)
+        self.manager.update(songTime=songTime)
+
+    def draw(self, surface, scale: float = 1.0) -> None:
+        self.manager.draw(surface, scale)
+
+    def bulletCount(self) -> int:
+        return self.manager.bulletCount()
+
+    def spawnedCount(self) -> int:
+        return self.manager.spawnedCount()
+
+    def emitterNames(self) -> list:
+        return list(self.manager.emitters)
+
+    def emitterCounts(self) -> dict:
+        return self.manager.emitterCounts()
+
+    def activeEmitters(self) -> list:
+        return self.manager.activeEmitters()
+
+    def bossStatus(self):
+        """(name, phase name, hp fraction) while the boss fight runs, else None."""
+        timeline = self.timeline
+        if not timeline.running:
+            return None
+        return timeline.boss.name, timeline.phase.name, timeline.boss.hpFraction
+
+    def lasers(self):
+        """Lasers of the active emitters."""
+        manager = self.manager
+        return [em.laser for name, em in manager.emitters.items()
+                if manager.active.get(name, False) and getattr(em, "laser", None) is not None]
+
+    def close(self) -> None:
+        self.manager.close()
+
+
+class SimulationWorker:
+    """
+    Worker-process side of RemoteSimulation. Steps a LocalSimulation once
+    per tick message and writes tick N into buffer N % 2, so the result
+    depends only on the message sequence, never on timing.
+    """
+    def __init__(self, shm, capacity: int, outbox, beatGrid, loopLength: float, boss: str):
+        from player import Player
+        self.shm = shm
+        self.capacity = capacity
+        self.outbox = outbox
+        self.frames = [SharedFrame(shm.buf, i, capacity) for i in range(2)]
+        self.sim = LocalSimulation(beatGrid, loopLength, boss)
+        self.player = Player(0, 0)
+        self.sim.attachPlayer(self.player)
+        self.styleIds = {}
+        self._lookups = {}
+        self._boss = None
+        outbox.put(("emitters", self.sim.emitterNames()))
+
+    def _styleLookup(self, name: str, table: BulletStore) -> np.ndarray:
+        """Table style id -> global style id, announcing new looks to the renderer."""
+        lookup = self._lookups.get(name)
+        if lookup is None or len(lookup) < len(table.styles):
+            for key in table.styleKeys():
+                if key not in self.styleIds:
+                    self.styleIds[key] = len(self.styleIds)
+                    self.outbox.put(("style", key[0], key[1]))
+            lookup = np.array([self.styleIds[key] for key in table.styleKeys()], dtype=np.uint8)
+            self._lookups[name] = lookup
+        return lookup
+
+    def step(self, message) -> None:
+        frameNo, songTime, px, py, level, commands, shots = message
+        player = self.player
+        player.x, player.y = px, py
+        if player.invulnerable > 0:
+            player.invulnerable -= 1
+        self.sim.budget.setLevel(level)
+        for name, args in commands:
+            getattr(self.sim, name)(*args)
+        for notice in self.sim.notices():
+            self.outbox.put(("log", notice))
+        if shots is not None:
+            player.shots.spawn(*shots, style=player.shotStyle)
+        self.sim.update(songTime)
+        self.publish(self.frames[frameNo % 2], frameNo)
+
+        status = self.sim.bossStatus()
+        boss = status[:2] if status else None
+        if boss != self._boss:
+            self._boss = boss
+            self.outbox.put(("boss", boss))
+        if frameNo % countsInterval == 0:
+            self.outbox.put(("counts", self.sim.emitterCounts(), self.sim.activeEmitters()))
+        self.outbox.put(("done", frameNo))
+
+    def publish(self, frame: SharedFrame, frameNo: int) -> None:
+        """Copy positions and looks of every bullet table, in draw order, into one buffer."""
+        offset = 0
+        for name, table in self.sim.manager.world.tables.items():
+            if not table.has("bullet"):
+                continue
+            n = min(table.count, self.capacity - offset)
+            if n == 0:
+                continue
+            lookup = self._styleLookup(name, table)
+            frame.x[offset:offset + n] = table.x[:n]
+            frame.y[offset:offset + n] = table.y[:n]
+            frame.style[offset:offset + n] = lookup[table.style[:n]]
+            offset += n
+
+        lasers = self.sim.lasers()[:maxLasers]
+        for i, laser in enumerate(lasers):
+            frame.lasers[i] = (laser.ax, laser.ay, laser.bx, laser.by, laser.width,
+                               LASER_PHASES.index(laser.phase), *laser.color)
+
+        timeline = self.sim.timeline
+        boss = timeline.boss
+        player = self.player
+        frame.header[:] = (frameNo, offset, self.sim.bulletCount(), self.sim.spawnedCount(), player.score,
+                           player.hits, player.invulnerable, timeline.running, boss.hpFraction, boss.x, boss.y,
+                           len(lasers))
+
+    def run(self, inbox) -> None:
+        while True:
+            message = inbox.get()
+            if message is None:
+                break
+            self.step(message)
+
+    def close(self) -> None:
+        self.sim.close()
+        # Views must go before the block can be closed
+        self.frames = []
+        self.shm.close()
+
+
+def runWorker(shmName: str, capacity: int, inbox, outbox, beatGrid, loopLength: float, boss: str,
+              width: int, height: int) -> None:
+    """Entry point of the simulation process."""
+    settings.WIDTH, settings.HEIGHT = width, height
+    worker = SimulationWorker(shared_memory.SharedMemory(name=shmName), capacity, outbox, beatGrid, loopLength, boss)
+    try:
+        worker.run(inbox)
+    finally:
+        worker.close()
+
+
+class RemoteSimulation:
+    """
+    Same interface as LocalSimulation, with the simulation in a worker process.
+
+    Each frame `update` waits for tick N, shows buffer N % 2, then sends tick
+    N + 1 with this frame's input. The worker writes N + 1 into the other
+    buffer while this process draws N, and cannot reach buffer N % 2 again
+    before tick N + 2 is sent, i.e. after drawing N has finished. Input
+    therefore lands one frame late, and no frame is ever read half-written.
+    Shot-hit events are published on the worker's own bus, not this one.
+    """
+    def __init__(self, beatGrid, loopLength: float = 0.0, boss: str = "boss1", capacity: int = frameCapacity):
+        context = multiprocessing.get_context("spawn")
+        self.capacity = capacity
+        self._shm = shared_memory.SharedMemory(create=True, size=2 * frameBytes(capacity))
+        self._frames = [SharedFrame(self._shm.buf, i, capacity) for i in range(2)]
+        self._inbox = context.Queue()
+        self._outbox = context.Queue()
+        self._process = context.Process(
+            target=runWorker, daemon=True,
+            args=(self._shm.name, capacity, self._inbox, self._outbox, beatGrid, loopLength, boss,
+                  settings.WIDTH, settings.HEIGHT))
+        self._process.start()
+        self.budget = FrameBudget()
+        self.player = None
+        # Draw-only store; its columns are pointed at the buffer being shown
+        self.view = BulletStore(1, maxBullets=1)
+        self._frameNo = -1
+        self._pending = None
+        self._commands = []
+        self._state = dict.fromkeys(HEADER, 0.0)
+        self._lasers = []
+        self._boss = None
+        self._counts = {}
+        self._active = []
+        self._emitterNames = None
+        self._notices = []
+
+    def attachPlayer(self, player, bus=None) -> None:
+        self.player = player
+
+    def toggle(self, name: str) -> None:
+        self._commands.append(("toggle", (name,)))
+
+    def startBoss(self) -> None:
+        self._commands.append(("startBoss", ()))
+
+    def cancelCircle(self, cx, cy, radius, convert=None) -> None:
+        self._commands.append(("cancelCircle", (cx, cy, radius, convert)))
+
+    def cancelSector(self, cx, cy, radius, angle, width, convert=None) -> None:
+        self._commands.append(("cancelSector", (cx, cy, radius, angle, width, convert)))
+
+    def retune(self, config: dict) -> None:
+        self._commands.append(("retune", (config,)))
+
+    def reloadPattern(self, spec: dict) -> None:
+        self._commands.append(("reloadPattern", (spec,)))
+
+    def notices(self) -> list:
+        """Problems the worker reported applying tuning, as they arrive."""
+        notices, self._notices = self._notices, []
+        return notices
+
+    def _receive(self, frameNo: int) -> None:
+        """Handle worker messages up to the completion of `frameNo` (None: up to the emitter list)."""
+        while True:
+            try:
+                message = self._outbox.get(timeout=workerTimeout)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError("simulation worker exited")
+                continue
+            kind = message[0]
+            if kind == "style":
+                self.view.registerStyle(message[1], message[2])
+            elif kind == "boss":
+                self._boss = message[1]
+            elif kind == "counts":
+                self._counts, self._active = message[1], message[2]
+            elif kind == "emitters":
+                self._emitterNames = message[1]
+            elif kind == "log":
+                self._notices.append(message[1])
+            elif kind == "done" and message[1] == frameNo:
+                return
+            if frameNo is None and kind == "emitters":
+                return
+
+    def _show(self, frame: SharedFrame) -> None:
+        state = self._state = frame.read()
+        n = int(state["count"])
+        view = self.view
+        view.x, view.y, view.style, view.count = frame.x, frame.y, frame.style, n
+        self._lasers = frame.lasers[:int(state["lasers"])].tolist()
+        player = self.player
+        if player is not None:
+            player.score = int(state["score"])
+            hits = int(state["hits"])
+            # Hits are taken in the worker; their sound plays here
+            if hits > player.hits and player.sfx is not None:
+                player.sfx.play(player.hitSound)
+            player.hits = hits
+            player.invulnerable = int(state["invulnerable"])
+            if state["bossRunning"]:
+                player.aimPoint = (state["bossX"], state["bossY"])
+
+    def update(self, songTime: float = None) -> None:
+        """Show the tick finished since last frame and hand this frame's input to the worker."""
+        if self._pending is not None:
+            self._receive(self._pending)
+            self._show(self._frames[self._pending % 2])
+
+        shots = None
+        player = self.player
+        px = py = 0.0
+        if player is not None:
+            px, py = player.x, player.y
+            # Fresh shots move to the worker, which owns the shots table
+            n = player.shots.count
+            if n:
+                s = player.shots
+                shots = (s.x[:n].copy(), s.y[:n].copy(), s.vx[:n].copy(), s.vy[:n].copy())
+                s.compact(np.zeros(n, dtype=bool))
+
+        self._frameNo += 1
+        self._inbox.put((self._frameNo, songTime, px, py, self.budget.level, self._commands, shots))
+        self._commands = []
+        self._pending = self._frameNo
+
+    def draw(self, surface, scale: float = 1.0) -> None:
+        cheap = self.budget.active("cheapBullets")
+        for ax, ay, bx, by, width, phase, r, g, b in self._lasers:
+            drawBeam(surface, ax, ay, bx, by, width, LASER_PHASES[int(phase)], (int(r), int(g), int(b)), cheap,
+                     scale)
+        self.view.draw(surface, scale, cheap)
+
+    def bulletCount(self) -> int:
+        return int(self._state["enemyCount"])
+
+    def spawnedCount(self) -> int:
+        return int(self._state["enemySpawned"])
+
+    def emitterNames(self) -> list:
+        """Emitter names, announced by the worker once it has built its emitters."""
+        while self._emitterNames is None:
+            self._receive(None)
+        return self._emitterNames
+
+    def emitterCounts(self) -> dict:
+        return self._counts
+
+    def activeEmitters(self) -> list:
+        return self._active
+
+    def bossStatus(self):
+        if not self._state["bossRunning"] or self._boss is None:
+            return None
+        return self._boss[0], self._boss[1], self._state["bossHp"]
+
+    def close(self) -> None:
+        """Stop the worker and release the shared block."""
+        self._inbox.put(None)
+        self._process.join(timeout=workerTimeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        view = self.view
+        view.x, view.y, view.style, view.count = np.zeros(1, np.float32), np.zeros(1, np.float32), np.zeros(1, np.uint8), 0
+        self._frames = []
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,163 @@
+"""
+Headless capacity stress test: for each emitter (and optional mixes), ramp
+the live bullet population step by step and report the largest one whose
+simulation + bullet drawing still fits the frame budget at p95.
+
+    python stress.py [--mix straight+sine,spiral+fan] [--step 500] [--json stress.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import settings
+from emitter_manager import EmitterManager, initEmitters
+
+defaultStep = 500
+defaultMaxBullets = 40000
+# Ticks measured per step, after the population has been topped up
+defaultWindow = 120
+maxBurstsPerTick = 256
+
+
+class StressTarget:
+    """Stand-in player for aimed and homing patterns."""
+    radius = 20
+    score = 0
+
+    def __init__(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+    def hit(self) -> None:
+        pass
+
+
+def buildManager(names, capacity: int) -> EmitterManager:
+    """Fresh manager with only `names` active, no beat grid and no quotas or global cap."""
+    settings.MAX_BULLETS = capacity
+    manager = EmitterManager(capacity=capacity, kindCapacity=capacity)
+    initEmitters(manager)
+    manager.setTarget(StressTarget(settings.WIDTH / 2, settings.HEIGHT * 0.8))
+    for name, em in manager.emitters.items():
+        manager.active[name] = name in names
+        if em.store is not None:
+            em.store.setQuota(em.ownerId, None)
+        em.prewarm()
+    return manager
+
+
+def topUp(emitters, target: int) -> None:
+    """Spawn extra bursts until each emitter holds its share of the target population."""
+    share = target / len(emitters)
+    for em in emitters:
+        for _ in range(maxBurstsPerTick):
+            if em.liveCount() >= share or em.spawn() == 0:
+                break
+
+
+def measureStep(manager, emitters, target: int, surface, window: int, budgetMs: float) -> dict:
+    clock = time.perf_counter
+    updateMs = np.zeros(window)
+    drawMs = np.zeros(window)
+    live = np.zeros(window, dtype=np.int64)
+    # Let the population settle at the new level before measuring
+    for _ in range(window // 2):
+        topUp(emitters, target)
+        manager.update()
+    for i in range(window):
+        topUp(emitters, target)
+        start = clock()
+        manager.update()
+        mid = clock()
+        surface.fill((0, 0, 0))
+        manager.draw(surface)
+        end = clock()
+        updateMs[i] = (mid - start) * 1000.0
+        drawMs[i] = (end - mid) * 1000.0
+        live[i] = manager.bulletCount()
+    frameMs = updateMs + drawMs
+    p95 = float(np.percentile(frameMs, 95))
+    return {"target": target, "live": int(np.median(live)), "updateMs": float(updateMs.mean()),
+            "drawMs": float(drawMs.mean()), "p95Ms": p95, "holds": p95 <= budgetMs}
+
+
+def runCase(names, surface, step: int, maxBullets: int, window: int, budgetMs: float) -> dict:
+    """Ramp one emitter or mix until a step misses the budget (or bullets stop growing)."""
+    manager = buildManager(names, maxBullets)
+    emitters = [manager.emitters[name] for name in names if manager.emitters[name].store is not None]
+    if not emitters:
+        manager.close()
+        return {"ceiling": None, "steps": [], "note": "spawns no bullets"}
+    steps = []
+    ceiling = 0
+    for target in range(step, maxBullets + 1, step):
+        result = measureStep(manager, emitters, target, surface, window, budgetMs)
+        steps.append(result)
+        if not result["holds"]:
+            break
+        ceiling = max(ceiling, result["live"])
+        if result["live"] < target * 0.5:
+            # The emitters cannot keep this many bullets alive; more steps measure nothing new
+            break
+    manager.close()
+    return {"ceiling": ceiling, "steps": steps}
+
+
+def formatTable(results: dict) -> str:
+    lines = [f"{'case':<24}{'ceiling':>9}{'update ms':>11}{'draw ms':>9}{'p95 ms':>8}"]
+    for name, result in results.items():
+        if result["ceiling"] is None:
+            lines.append(f"{name:<24}{'-':>9}  ({result['note']})")
+            continue
+        held = [s for s in result["steps"] if s["holds"]] or result["steps"][:1]
+        last = held[-1]
+        lines.append(f"{name:<24}{result['ceiling']:>9}{last['updateMs']:>11.2f}"
+                     f"{last['drawMs']:>9.2f}{last['p95Ms']:>8.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emitters", help="comma-separated emitters to test alone (default: all)")
+    parser.add_argument("--mix", default="", help="comma-separated mixes of emitters joined by '+'")
+    parser.add_argument("--step", type=int, default=defaultStep, help="bullets added per step")
+    parser.add_argument("--max", type=int, default=defaultMaxBullets, help="largest population to try")
+    parser.add_argument("--window", type=int, default=defaultWindow, help="ticks measured per step")
+    parser.add_argument("--budget", type=float, default=1000.0 / settings.FPS_TARGET, help="frame budget in ms")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    pygame.init()
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    names = args.emitters.split(",") if args.emitters else list(buildManager((), defaultStep).emitters)
+    cases = [(name,) for name in names] + [tuple(mix.split("+")) for mix in args.mix.split(",") if mix]
+
+    results = {}
+    for case in cases:
+        label = "+".join(case)
+        results[label] = runCase(case, surface, args.step, args.max, args.window, args.budget)
+        print(f"{label}: {results[label]['ceiling']}", flush=True)
+
+    print()
+    print(formatTable(results))
+    if args.json:
+        report = {"machine": {"platform": platform.platform(), "processor": platform.processor(),
+                              "python": platform.python_version(), "cpus": os.cpu_count()},
+                  "budgetMs": args.budget, "step": args.step, "window": args.window,
+                  "resolution": [settings.WIDTH, settings.HEIGHT], "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
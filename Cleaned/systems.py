@@ -0,0 +1,142 @@
+"""
+World systems: each one runs over every archetype table carrying its components.
+Per-table (and per-chunk) kernels go through `world.parallel`, so they may run on threads.
+"""
+
+from functools import partial
+
+import numpy as np
+
+import bullet_system
+from bullet_store import circleMask
+from bullet_system import bezierPlace
+
+# Pickups and particles produced by bullet cancellation
+itemColor = (255, 230, 90)
+itemValue = 10
+itemPopSpeed = 2.0
+itemGravity = 0.08
+itemFallSpeed = 3.0
+itemMagnetRadius = 150
+itemCollectRadius = 24
+particleColor = (255, 255, 255)
+particleLifetime = 30
+
+
+def homingSystem(world) -> None:
+    """Steer homing rows toward the world's target."""
+    target = world.target
+    if target is None:
+        return
+    world.parallel([partial(table.steer, target.x, target.y) for table in world.query("homing")])
+
+
+def _orbit(table) -> None:
+    rows = np.flatnonzero(table.orbiting[:table.count])
+    if len(rows) == 0:
+        return
+    radius = table.orbitRadius[rows]
+    expanding = radius < table.targetRadius[rows]
+    radius = np.where(expanding, radius + bullet_system.orbitExpandSpeed, radius)
+    dx, dy = table.dirX[rows], table.dirY[rows]
+    # Read through the module so hot-reloaded constants apply
+    step = bullet_system.orbitStep
+    c, s = step.real, step.imag
+    dx, dy = np.where(expanding, dx, dx * c - dy * s), np.where(expanding, dy, dx * s + dy * c)
+    table.dirX[rows], table.dirY[rows] = dx, dy
+    table.orbitRadius[rows] = radius
+    owners = table.owner[rows]
+    table.x[rows] = table.originX[owners] + radius * dx
+    table.y[rows] = table.originY[owners] + radius * dy
+
+
+def orbitSystem(world) -> None:
+    """Expand orbiting rows to their radius, then spin them around their owner's origin."""
+    world.parallel([partial(_orbit, table) for table in world.query("orbit")])
+
+
+def _bezier(table) -> None:
+    n = table.count
+    rows = np.flatnonzero(table.frame[:n] < table.travelFrames[:n])
+    if len(rows) == 0:
+        return
+    table.frame[rows] += 1
+    t = table.frame[rows] / table.travelFrames[rows]
+    onCurve = t < 1.0
+    bezierPlace(table, rows[onCurve], t[onCurve])
+    done = rows[~onCurve]
+    if len(done):
+        dx = table.p2x[done] - table.p1x[done]
+        dy = table.p2y[done] - table.p1y[done]
+        length = np.hypot(dx, dy)
+        length[length == 0] = 1.0
+        speed = bullet_system.straightSpeed
+        table.vx[done] = speed * dx / length
+        table.vy[done] = speed * dy / length
+
+
+def bezierSystem(world) -> None:
+    """Move rows along their curves; on arrival they fly out along the end tangent."""
+    world.parallel([partial(_bezier, table) for table in world.query("bezier")])
+
+
+def _move(table, rows: slice) -> None:
+    table.x[rows] += table.vx[rows]
+    table.y[rows] += table.vy[rows]
+
+
+def movementSystem(world) -> None:
+    """Integrate velocity for every moving table, in row chunks, and advance its tick."""
+    jobs = []
+    for table in world.query("position", "velocity"):
+        jobs.extend(partial(_move, table, rows) for rows in world.chunks(table.count))
+        table.tick += 1
+    world.parallel(jobs)
+
+
+def _wiggle(table, rows: slice) -> None:
+    table.phase[rows] += 1
+    offset = table.amplitude[rows] * np.sin(table.phase[rows] * table.frequency[rows])
+    table.x[rows] += table.perpX[rows] * offset
+    table.y[rows] += table.perpY[rows] * offset
+
+
+def sineSystem(world) -> None:
+    """Add the sideways wiggle of sine rows."""
+    world.parallel([partial(_wiggle, table, rows)
+                    for table in world.query("sine") for rows in world.chunks(table.count)])
+
+
+def pickupSystem(world) -> None:
+    """Items fall, drift toward a nearby target and are collected into its score."""
+    items = world.tables.get("items")
+    if items is None or items.count == 0:
+        return
+    n = items.count
+    np.minimum(items.vy[:n] + itemGravity, itemFallSpeed, out=items.vy[:n])
+    target = world.target
+    if target is None:
+        return
+    tx, ty = target.x, target.y
+    near = circleMask(items.x[:n], items.y[:n], tx, ty, itemMagnetRadius)
+    items.vx[:n] = np.where(near, (tx - items.x[:n]) * 0.15, 0.0)
+    items.vy[:n] = np.where(near, (ty - items.y[:n]) * 0.15, items.vy[:n])
+    xs, _ = items.cancel(lambda x, y: circleMask(x, y, tx, ty, itemCollectRadius))
+    target.score += len(xs) * itemValue
+
+
+def lifetimeSystem(world) -> None:
+    """Expire rows of tables with a fixed lifetime."""
+    world.parallel([partial(table.expire, table.lifetime)
+                    for table in world.query("bullet") if table.lifetime is not None])
+
+
+def cullSystem(world) -> None:
+    """Drop bullets that left their table's bounds."""
+    world.parallel([table.cull for table in world.query("bullet")])
+
+
+def renderSystem(world, surface, scale: float = 1.0, cheap: bool = False) -> None:
+    """Blit every bullet table, in the order the tables were added."""
+    for table in world.query("bullet"):
+        table.draw(surface, scale, cheap)
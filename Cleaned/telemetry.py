@@ -0,0 +1,122 @@
+"""Per-frame telemetry: a preallocated ring of records flushed to a binary log by a background thread."""
+
+import gc
+import json
+import threading
+
+import numpy as np
+
+logFormat = "bullet-hell-telemetry"
+logVersion = 1
+
+
+def recordDtype(stages, emitters) -> np.dtype:
+    """Flat record layout: one field per stage, per emitter count and per emitter active flag."""
+    fields = [("tick", np.int64), ("frameMs", np.float32), ("beatAmplitude", np.float32),
+              ("gc0", np.int32), ("gc1", np.int32), ("gc2", np.int32)]
+    fields += [("stage." + name, np.float32) for name in stages]
+    fields += [("bullets." + name, np.int32) for name in emitters]
+    fields += [("active." + name, bool) for name in emitters]
+    return np.dtype(fields)
+
+
+class TelemetryRecorder:
+    """
+    Writes one record per frame into a ring of `capacity` rows. A writer
+    thread appends completed rows to the log every `flushEvery` frames, so
+    the game thread only ever fills preallocated memory. If the writer
+    falls a whole ring behind, the oldest unwritten rows are dropped and
+    counted rather than stalling a frame.
+
+    The log is a JSON header line (dtype, stage and emitter names)
+    followed by raw little-endian records; read it with loadTelemetry.
+    """
+    def __init__(self, path: str, stages, emitters, capacity: int = 4096, flushEvery: int = 256):
+        self.path = path
+        self.stages = tuple(stages)
+        self.emitters = tuple(emitters)
+        self.dtype = recordDtype(self.stages, self.emitters).newbyteorder("<")
+        self.ring = np.zeros(capacity, dtype=self.dtype)
+        self.flushEvery = flushEvery
+        self.written = 0
+        self.flushed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = False
+        header = {"format": logFormat, "version": logVersion, "dtype": self.dtype.descr,
+                  "stages": self.stages, "emitters": self.emitters}
+        self._file = open(path, "wb")
+        self._file.write((json.dumps(header) + "\n").encode("utf-8"))
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def record(self, tick: int, frameMs: float, stageMs: dict, emitterCounts: dict, active,
+               beatAmplitude: float = 0.0) -> None:
+        """Fill the next ring row; wakes the writer every `flushEvery` frames."""
+        row = self.ring[self.written % len(self.ring)]
+        row["tick"] = tick
+        row["frameMs"] = frameMs
+        row["beatAmplitude"] = beatAmplitude
+        stats = gc.get_stats()
+        row["gc0"], row["gc1"], row["gc2"] = (s["collections"] for s in stats[:3])
+        for name in self.stages:
+            row["stage." + name] = stageMs.get(name, 0.0)
+        for name in self.emitters:
+            row["bullets." + name] = emitterCounts.get(name, 0)
+            row["active." + name] = name in active
+        with self._lock:
+            self.written += 1
+        if self.written - self.flushed >= self.flushEvery:
+            self._wake.set()
+
+    def _take(self) -> np.ndarray:
+        """Copy out the rows written since the last flush, oldest first."""
+        with self._lock:
+            start, end = self.flushed, self.written
+            capacity = len(self.ring)
+            if end - start > capacity:
+                self.dropped += end - start - capacity
+                start = end - capacity
+            self.flushed = end
+            rows = np.arange(start, end) % capacity
+            return self.ring[rows]
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # Sampled before taking, so the last take covers every row recorded before close()
+            stop = self._stop
+            rows = self._take()
+            if len(rows):
+                self._file.write(rows.tobytes())
+                self._file.flush()
+            if stop:
+                return
+
+    def close(self) -> None:
+        """Flush the remaining rows and close the log."""
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+
+
+def loadTelemetry(path: str) -> dict:
+    """
+    Read a telemetry log into NumPy arrays keyed by field name ("tick",
+    "frameMs", "stage.cube", "bullets.spiral", ...), plus the header
+    under "meta".
+    """
+    with open(path, "rb") as f:
+        header = json.loads(f.readline().decode("utf-8"))
+        if header.get("format") != logFormat:
+            raise ValueError(f"Not a telemetry log: {path}")
+        dtype = np.dtype([tuple(field) for field in header["dtype"]])
+        data = f.read()
+    # A log cut off mid-record keeps its complete rows
+    records = np.frombuffer(data, dtype=dtype, count=len(data) // dtype.itemsize)
+    log = {name: records[name] for name in dtype.names}
+    log["meta"] = header
+    return log
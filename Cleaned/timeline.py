@@ -0,0 +1,265 @@
+"""Boss timelines: data-driven spell-card phases with emitter pre-warming."""
+
+import json
+import os
+from collections import deque
+
+import settings
+from ecs import Archetype
+from transform import TransformNode
+
+bossDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bosses")
+
+
+class Boss:
+    """
+    Boss entity: a row in a hitbox table (position, radius, hp) while it is
+    on the field, plus the transform node its rig hangs from.
+    """
+    def __init__(self, name: str, maxHp: float, radius: float = 60.0, table: Archetype = None):
+        self.name = name
+        self.maxHp = maxHp
+        self.radius = radius
+        self.node = TransformNode(name=name)
+        self.table = table if table is not None else Archetype(("position", "hitbox", "enemy"), capacity=1)
+        self.handle = None
+        self._hp = maxHp
+
+    def spawn(self) -> None:
+        """Add the boss's row to its table at full health."""
+        if self.handle is None:
+            sl = self.table._allocate(1)
+            self.handle = int(self.table.handle[sl.start])
+            self.table.hitRadius[sl] = self.radius
+        self.hp = self.maxHp
+        self.sync()
+
+    def despawn(self) -> None:
+        """Remove the boss's row; its hp stays readable."""
+        if self.handle is not None:
+            self._hp = self.hp
+            self.table.remove([self.handle])
+            self.handle = None
+
+    def sync(self) -> None:
+        """Copy the node's world position into the boss's row."""
+        if self.handle is not None:
+            row = self.table.rowOf[self.handle]
+            self.table.x[row] = self.node.worldX
+            self.table.y[row] = self.node.worldY
+
+    @property
+    def hp(self) -> float:
+        if self.handle is None:
+            return self._hp
+        return float(self.table.hp[self.table.rowOf[self.handle]])
+
+    @hp.setter
+    def hp(self, value: float) -> None:
+        self._hp = value
+        if self.handle is not None:
+            self.table.hp[self.table.rowOf[self.handle]] = value
+
+    @property
+    def x(self) -> float:
+        return self.node.worldX
+
+    @property
+    def y(self) -> float:
+        return self.node.worldY
+
+    @property
+    def hpFraction(self) -> float:
+        return self.hp / self.maxHp if self.maxHp else 0.0
+
+    def damage(self, amount: float) -> None:
+        self.hp = max(0.0, self.hp - amount)
+
+
+class Phase:
+    """One spell card: timed emitter events plus its end conditions."""
+    def __init__(self, spec: dict):
+        self.name = spec.get("name", "Phase")
+        self.endHp = spec.get("endHp", 0.0)
+        self.durationTicks = spec.get("ticks")
+        self.durationBeats = spec.get("beats")
+        self.transitionTicks = spec.get("transitionTicks", 30)
+        self.moveTo = spec.get("moveTo")
+        self.moveTicks = spec.get("moveTicks", 120)
+        self.spin = spec.get("spin")
+        # Tick and beat events sorted by time; each is (time, action, emitterName)
+        self.tickEvents = []
+        self.beatEvents = []
+        for ev in spec.get("events", []):
+            action = "start" if "start" in ev else "stop"
+            if "beat" in ev:
+                self.beatEvents.append((ev["beat"], action, ev[action]))
+            else:
+                self.tickEvents.append((ev.get("tick", 0), action, ev[action]))
+        self.tickEvents.sort(key=lambda e: e[0])
+        self.beatEvents.sort(key=lambda e: e[0])
+        self.emitterNames = sorted({name for _, _, name in self.tickEvents + self.beatEvents})
+
+
+class BossTimeline:
+    """
+    Runs a boss's phases in order on the EmitterManager.
+    While a phase runs, the next phase's emitters are pre-warmed one per
+    tick so the phase change itself only flips emitter flags.
+    """
+    def __init__(self, spec: dict, manager, beatPeriod: float = None):
+        self.boss = Boss(spec.get("name", "Boss"), spec.get("hp", 1000), spec.get("hitbox", 60.0),
+                         manager.world.tables.get("bosses"))
+        self.phases = [Phase(p) for p in spec["phases"]]
+        self.manager = manager
+        self.rig = spec.get("rig", {})
+        self.arms = {}
+        self.beatPeriod = beatPeriod
+        self.phaseIndex = -1
+        self.running = False
+        self.finished = False
+        self._phaseTick = 0
+        self._phaseBeats = 0.0
+        self._lastSong = None
+        self._tickCursor = 0
+        self._beatCursor = 0
+        self._transition = 0
+        self._warmQueue = deque()
+
+    @property
+    def phase(self):
+        return self.phases[self.phaseIndex] if 0 <= self.phaseIndex < len(self.phases) else None
+
+    def _buildRig(self) -> None:
+        """Place the boss node and its arms in the transform tree and hang emitters on them."""
+        tree = self.manager.transforms
+        node = self.boss.node
+        fx, fy = self.rig.get("position", (0.5, 0.25))
+        node.setPosition(fx * settings.WIDTH, fy * settings.HEIGHT)
+        node.vx = node.vy = 0.0
+        node.rotation, node.spin = 0.0, self.rig.get("spin", 0.0)
+        tree.attach(node)
+        for name in self.rig.get("emitters", []):
+            self.manager.attachEmitter(name, node)
+        for arm in self.rig.get("arms", []):
+            armNode = self.arms.get(arm["name"]) or TransformNode(name=arm["name"])
+            armNode.setPosition(arm.get("x", 0.0), arm.get("y", 0.0))
+            armNode.rotation, armNode.spin = arm.get("rotation", 0.0), arm.get("spin", 0.0)
+            self.arms[arm["name"]] = tree.attach(armNode, node)
+            for name in arm.get("emitters", []):
+                self.manager.attachEmitter(name, armNode)
+
+    def _releaseRig(self) -> None:
+        """Return rigged emitters to the playfield center."""
+        names = list(self.rig.get("emitters", []))
+        for arm in self.rig.get("arms", []):
+            names.extend(arm.get("emitters", []))
+        for name in names:
+            self.manager.attachEmitter(name)
+
+    def start(self) -> None:
+        """Stop whatever is running and begin the first phase."""
+        for name in self.manager.emitters:
+            self.manager.disable(name)
+        self._buildRig()
+        self.boss.spawn()
+        self.running = True
+        self.finished = False
+        self.phaseIndex = -1
+        # A finished fight leaves its last transition and song position behind
+        self._transition = 0
+        self._lastSong = None
+        self._queueWarm(0)
+        while self._warmQueue:
+            self._warmStep()
+        self._enterPhase(0)
+
+    def _queueWarm(self, index: int) -> None:
+        if 0 <= index < len(self.phases):
+            self._warmQueue.extend(self.phases[index].emitterNames)
+
+    def _warmStep(self) -> None:
+        if self._warmQueue:
+            self.manager.prewarm(self._warmQueue.popleft())
+
+    def _enterPhase(self, index: int) -> None:
+        self.phaseIndex = index
+        self._phaseTick = 0
+        self._phaseBeats = 0.0
+        self._tickCursor = 0
+        self._beatCursor = 0
+        self._queueWarm(index + 1)
+        phase = self.phases[index]
+        if phase.moveTo is not None:
+            self.boss.node.moveTo(phase.moveTo[0] * settings.WIDTH, phase.moveTo[1] * settings.HEIGHT, phase.moveTicks)
+        if phase.spin is not None:
+            self.boss.node.spin = phase.spin
+
+    def _endPhase(self) -> None:
+        for name in self.phase.emitterNames:
+            self.manager.disable(name)
+        # Phase clear: every enemy bullet becomes a score item
+        self.manager.cancelAll(convert="items")
+        if self.phaseIndex + 1 >= len(self.phases):
+            self.running = False
+            self.finished = True
+            self._releaseRig()
+            self.boss.despawn()
+        elif self.phase.transitionTicks > 0:
+            self._transition = self.phase.transitionTicks
+        else:
+            self._enterPhase(self.phaseIndex + 1)
+
+    def _fire(self, events, cursor: int, now: float) -> int:
+        while cursor < len(events) and events[cursor][0] <= now:
+            _, action, name = events[cursor]
+            if action == "start":
+                self.manager.enable(name)
+            else:
+                self.manager.disable(name)
+            cursor += 1
+        return cursor
+
+    def _phaseOver(self) -> bool:
+        phase = self.phase
+        if self.boss.hpFraction <= phase.endHp:
+            return True
+        if phase.durationTicks is not None and self._phaseTick >= phase.durationTicks:
+            return True
+        return phase.durationBeats is not None and self._phaseBeats >= phase.durationBeats
+
+    def update(self, songTime: float = None, loopLength: float = 0.0) -> None:
+        """Advance one tick: fire due events, check end conditions, pre-warm."""
+        if not self.running:
+            return
+        self._warmStep()
+        self.boss.sync()
+
+        # Beat time advances with the song, across loop wrap-around
+        if songTime is not None and self.beatPeriod:
+            if self._lastSong is not None:
+                delta = songTime - self._lastSong
+                if delta < 0:
+                    delta += loopLength
+                self._phaseBeats += delta / self.beatPeriod
+            self._lastSong = songTime
+
+        if self._transition > 0:
+            self._transition -= 1
+            if self._transition == 0:
+                self._enterPhase(self.phaseIndex + 1)
+            return
+
+        phase = self.phase
+        self._tickCursor = self._fire(phase.tickEvents, self._tickCursor, self._phaseTick)
+        self._beatCursor = self._fire(phase.beatEvents, self._beatCursor, self._phaseBeats)
+
+        self._phaseTick += 1
+        if self._phaseOver():
+            self._endPhase()
+
+
+def loadTimeline(name: str, manager, beatPeriod: float = None, directory: str = bossDir) -> BossTimeline:
+    """Load a boss timeline from bosses/<name>.json."""
+    with open(os.path.join(directory, name + ".json"), "r", encoding="utf-8") as f:
+        return BossTimeline(json.load(f), manager, beatPeriod)
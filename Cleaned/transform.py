@@ -0,0 +1,99 @@
+"""Lightweight transform hierarchy for moving, rotating emitter origins."""
+
+import math
+
+
+class TransformNode:
+    """
+    Position, rotation and velocity relative to a parent node.
+    World values are cached by TransformTree.update() once per tick.
+    """
+    def __init__(self, x: float = 0.0, y: float = 0.0, rotation: float = 0.0,
+                 vx: float = 0.0, vy: float = 0.0, spin: float = 0.0, name: str = ""):
+        self.name = name
+        self.x, self.y = x, y
+        self.rotation = rotation
+        self.vx, self.vy = vx, vy
+        self.spin = spin
+        self.parent = None
+        self.depth = 0
+        self._moveTicks = 0
+
+        self.worldX, self.worldY = x, y
+        self.worldRotation = rotation
+        self.worldRotor = complex(math.cos(rotation), math.sin(rotation))
+
+    def setPosition(self, x: float, y: float) -> None:
+        self.x, self.y = x, y
+
+    def moveTo(self, x: float, y: float, ticks: int) -> None:
+        """Glide to a local position over a number of ticks."""
+        if ticks <= 0:
+            self.setPosition(x, y)
+            self.vx = self.vy = 0.0
+            return
+        self.vx = (x - self.x) / ticks
+        self.vy = (y - self.y) / ticks
+        self._moveTicks = ticks
+
+    def _integrate(self) -> None:
+        self.x += self.vx
+        self.y += self.vy
+        self.rotation += self.spin
+        if self._moveTicks:
+            self._moveTicks -= 1
+            if self._moveTicks == 0:
+                self.vx = self.vy = 0.0
+
+
+class TransformTree:
+    """
+    Nodes kept in parent-before-child order, so one linear pass computes
+    every world transform top-down.
+    """
+    def __init__(self):
+        self.root = TransformNode(name="root")
+        self.nodes = [self.root]
+
+    def attach(self, node: TransformNode, parent: TransformNode = None) -> TransformNode:
+        """Add a node (or move it) under a parent; returns the node."""
+        node.parent = parent if parent is not None else self.root
+        if node not in self.nodes:
+            self.nodes.append(node)
+        self._reorder()
+        return node
+
+    def detach(self, node: TransformNode) -> None:
+        """Remove a node; its children move up to its parent."""
+        if node is self.root or node not in self.nodes:
+            return
+        for child in self.nodes:
+            if child.parent is node:
+                child.parent = node.parent
+        self.nodes.remove(node)
+        self._reorder()
+
+    def _reorder(self) -> None:
+        for node in self.nodes:
+            depth, p = 0, node.parent
+            while p is not None:
+                depth += 1
+                p = p.parent
+            node.depth = depth
+        self.nodes.sort(key=lambda n: n.depth)
+
+    def update(self) -> None:
+        """Integrate local motion and recompute every world transform."""
+        for node in self.nodes:
+            node._integrate()
+            parent = node.parent
+            if parent is None:
+                node.worldX, node.worldY = node.x, node.y
+                node.worldRotation = node.rotation
+            else:
+                # Local offset rotated into the parent's frame
+                offset = complex(node.x, node.y) * parent.worldRotor
+                node.worldX = parent.worldX + offset.real
+                node.worldY = parent.worldY + offset.imag
+                node.worldRotation = parent.worldRotation + node.rotation
+            node.worldRotor = complex(math.cos(node.worldRotation), math.sin(node.worldRotation))
@@ -0,0 +1,78 @@
+"""Fixed logical playfield drawn at a chosen internal resolution and upscaled once to the window."""
+
+import pygame
+
+import settings
+
+
+class Viewport:
+    """
+    The game simulates in the logical playfield (settings.WIDTH x HEIGHT)
+    on every display. Drawing goes to `surface`, the playfield times
+    `scale`, so fill and blit cost follow the scale, not the monitor.
+
+    The fullscreen window is opened with pygame.SCALED at that size, and
+    SDL stretches it to the display (letterboxed) on the GPU while
+    flipping. Without a renderer for that, the window takes the native
+    resolution and `present` stretches `surface` into it in software.
+    """
+    def __init__(self, scale: float = None):
+        self.layers = {}
+        self.setScale(settings.RENDER_SCALE if scale is None else scale)
+
+    def setScale(self, scale: float) -> None:
+        """(Re)open the window for an internal resolution of the playfield times `scale`."""
+        self.scale = scale
+        size = (max(1, round(settings.WIDTH * scale)), max(1, round(settings.HEIGHT * scale)))
+        try:
+            self.window = pygame.display.set_mode(size, pygame.FULLSCREEN | pygame.SCALED)
+            self.surface = self.window
+        except pygame.error:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+            self.surface = pygame.Surface(size).convert(self.window)
+            self._fit()
+        self.layers.clear()
+
+    def _fit(self) -> None:
+        """Largest aspect-correct rect of the window, and the letterbox bars around it."""
+        windowW, windowH = self.window.get_size()
+        fit = min(windowW / settings.WIDTH, windowH / settings.HEIGHT)
+        r = self.rect = pygame.Rect(0, 0, round(settings.WIDTH * fit), round(settings.HEIGHT * fit))
+        r.center = (windowW // 2, windowH // 2)
+        self._target = self.window.subsurface(r)
+        # Cleared each frame, since the HUD may draw over them
+        bars = (pygame.Rect(0, 0, windowW, r.top), pygame.Rect(0, r.bottom, windowW, windowH - r.bottom),
+                pygame.Rect(0, r.top, r.left, r.height), pygame.Rect(r.right, r.top, windowW - r.right, r.height))
+        self._bars = [bar for bar in bars if bar.width > 0 and bar.height > 0]
+
+    @property
+    def hardwareScaled(self) -> bool:
+        return self.surface is self.window
+
+    def layer(self, name: str, render) -> pygame.Surface:
+        """A static full-playfield layer, drawn once by `render(surface, scale)` and kept until invalidated."""
+        surface = self.layers.get(name)
+        if surface is None:
+            surface = self.surface.copy()
+            surface.fill((0, 0, 0))
+            render(surface, self.scale)
+            self.layers[name] = surface
+        return surface
+
+    def invalidate(self, name: str = None) -> None:
+        """Forget one cached layer, or all of them."""
+        if name is None:
+            self.layers.clear()
+        else:
+            self.layers.pop(name, None)
+
+    def present(self) -> None:
+        """Upscale the internal surface into the window; nothing to do when SDL scales on flip."""
+        if self.hardwareScaled:
+            return
+        for bar in self._bars:
+            self.window.fill((0, 0, 0), bar)
+        if self.surface.get_size() == self.rect.size:
+            self._target.blit(self.surface, (0, 0))
+        else:
+            pygame.transform.scale(self.surface, self.rect.size, self._target)